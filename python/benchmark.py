@@ -0,0 +1,194 @@
+import sys
+import json
+import argparse
+from tabulate import tabulate
+
+# Benchmark harness
+# Runs the scenario a number of times against the live sites or a HAR replay and
+# reports p50/p95/p99 of session and step durations, WebDriver commands per step
+# and the share of time spent in fixed sleeps versus condition waits. Results can
+# be saved as a baseline; later runs fail when they regress past a threshold.
+# With --lanes, every session runs that many multiplexed lanes, and the report
+# shows the share of time lanes waited for each other's WebDriver commands.
+#
+#   python benchmark.py --runs 20 --save-baseline baseline.json
+#   python benchmark.py --runs 20 --target replay --har recording.har --baseline baseline.json
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _duration(span):
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+
+
+def analyze(spans, results):
+    """Builds the benchmark report from the recorded spans and session results"""
+    by_id = {span["spanId"]: span for span in spans}
+
+    def enclosing_step(span):
+        while span is not None:
+            if span.get("kind") == "step":
+                return span["name"]
+            span = by_id.get(span.get("parentSpanId"))
+        return None
+
+    sessions = [_duration(s) for s in spans if s["kind"] == "session"]
+    steps = {}
+    for span in spans:
+        if span["kind"] == "step":
+            steps.setdefault(span["name"], {"durations": [], "commands": 0, "runs": 0})
+            steps[span["name"]]["durations"].append(_duration(span))
+            steps[span["name"]]["runs"] += 1
+    totals = {"sleep": 0.0, "wait": 0.0, "lock": 0.0}
+    for span in spans:
+        step = enclosing_step(by_id.get(span.get("parentSpanId")))
+        if span["kind"] == "webdriver" and step in steps:
+            steps[step]["commands"] += 1
+        elif span["kind"] in totals and not _nested_in(span, span["kind"], by_id):
+            totals[span["kind"]] += _duration(span)
+
+    session_time = sum(sessions)
+    lanes = [lane for result in results for lane in (result.lanes or [result])]
+    return {
+        "runs": len(lanes),
+        "passed": sum(1 for r in lanes if r.ok),
+        "total": {f"p{p}": percentile(sessions, p) for p in PERCENTILES},
+        "steps": {
+            name: dict({f"p{p}": percentile(step["durations"], p) for p in PERCENTILES},
+                       commands=step["commands"] / step["runs"])
+            for name, step in steps.items()
+        },
+        "sleep_share": totals["sleep"] / session_time if session_time else 0.0,
+        "wait_share": totals["wait"] / session_time if session_time else 0.0,
+        # Summed over lanes, so with N lanes it can reach N - 1 when they only wait for each other
+        "lock_share": totals["lock"] / session_time if session_time else 0.0,
+    }
+
+
+def _nested_in(span, kind, by_id):
+    parent = by_id.get(span.get("parentSpanId"))
+    while parent is not None:
+        if parent["kind"] == kind:
+            return True
+        parent = by_id.get(parent.get("parentSpanId"))
+    return False
+
+
+def format_report(report):
+    rows = [["session"] + [f"{report['total'][f'p{p}']:.2f}" for p in PERCENTILES] + [""]]
+    for name, step in report["steps"].items():
+        rows.append([name] + [f"{step[f'p{p}']:.2f}" for p in PERCENTILES] + [f"{step['commands']:.1f}"])
+    table = tabulate(rows, headers=["", "p50 s", "p95 s", "p99 s", "commands"], tablefmt="pretty")
+    return (f"{table}\n"
+            f"Runs: {report['runs']} (passed {report['passed']})\n"
+            f"Time in fixed sleeps: {report['sleep_share'] * 100:.1f}%  "
+            f"in condition waits: {report['wait_share'] * 100:.1f}%"
+            + (f"  waiting for other lanes: {report['lock_share'] * 100:.1f}%" if report.get("lock_share") else ""))
+
+
+def find_regressions(report, baseline, threshold):
+    """Lists every p50/p95 or command count that grew by more than threshold over the baseline"""
+    regressions = []
+
+    def check(label, current, previous):
+        if previous and current > previous * (1 + threshold):
+            regressions.append(f"{label}: {previous:.2f} -> {current:.2f} (+{(current / previous - 1) * 100:.0f}%)")
+
+    for key in ("p50", "p95"):
+        check(f"session {key}", report["total"][key], baseline["total"].get(key))
+    for name, step in report["steps"].items():
+        previous = baseline["steps"].get(name)
+        if not previous:
+            continue
+        for key in ("p50", "p95", "commands"):
+            check(f"{name} {key}", step[key], previous.get(key))
+    return regressions
+
+
+def run(runs, concurrency, target, har=None, replay_address=None, cert=None, key=None, pool=False, lanes=1):
+    """Runs the scenario and returns (spans, session results)"""
+    import final_test_script as suite
+    import tracing
+    import har_replay
+    from scheduler import SessionScheduler
+    from session_pool import SessionPool
+    from instrumentation import add_command_listener
+
+    exporter = tracing.MemoryExporter()
+    tracing.configure(exporter=exporter)
+    add_command_listener(tracing.record_command)
+    if target == "replay":
+        suite.REPLAY_HAR = har  # Tags every session with its own replay client id
+        har_replay.start_replay_server(har, suite.REPLAY_PORT, certfile=cert, keyfile=key)
+        har_replay.apply_replay(suite.options, replay_address or suite.REPLAY_ADDRESS)
+
+    scenario = suite.run_scenario
+    if lanes > 1:
+        suite.MULTIPLEX_LANES = lanes
+        suite.options.page_load_strategy = "eager"
+        scenario = suite.run_multiplexed
+    session_pool = SessionPool(suite.create_driver, concurrency, log=suite.log_message) if pool else None
+    scheduler = SessionScheduler(suite.create_driver, scenario, concurrency=concurrency,
+                                 summary_every=0, log=suite.log_message, pool=session_pool)
+    try:
+        results = scheduler.run_batch(runs)
+    finally:
+        if session_pool:
+            session_pool.close()
+    return exporter.spans, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end session latency and step cost")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--target", choices=["live", "replay"], default="live")
+    parser.add_argument("--har", help="Recording to replay when --target replay")
+    parser.add_argument("--replay-address", help="host:port at which Chrome reaches the replay server")
+    parser.add_argument("--cert", help="TLS certificate for the replay server")
+    parser.add_argument("--key", help="TLS private key for the replay server")
+    parser.add_argument("--pool", action="store_true", help="Reuse warm sessions between runs")
+    parser.add_argument("--lanes", type=int, default=1, help="Multiplexed scenario lanes per session")
+    parser.add_argument("--baseline", help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression, e.g. 0.15 = 15%%")
+    parser.add_argument("--save-baseline", help="Write the results to this baseline file")
+    args = parser.parse_args(argv)
+    if args.target == "replay" and not args.har:
+        parser.error("--target replay requires --har")
+
+    spans, results = run(args.runs, args.concurrency, args.target, args.har, args.replay_address,
+                         args.cert, args.key, args.pool, args.lanes)
+    report = analyze(spans, results)
+    print(format_report(report))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print("❌ Regressions past the threshold:")
+            for regression in regressions:
+                print(f" - {regression}")
+            return 1
+        print("✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+from cdp import execute_cdp
+
+# Pre-seeded browser state
+# Consent cookies and localStorage entries captured after the cookie banner was
+# accepted once are injected before the first navigation, so later sessions skip
+# the banner. The state file is versioned; stale or rejected state falls back to
+# the click flow, which captures a fresh copy.
+
+STATE_VERSION = 1
+
+# Cookie and localStorage names written by the CookieLawInfo consent banner
+CONSENT_MARKERS = ("cookielawinfo", "viewed_cookie_policy", "wt_consent", "wt-cli", "consent")
+
+# Writes localStorage entries on documents of the captured origin before any page script runs
+_LOCAL_STORAGE_SCRIPT = """
+(function (origin, items) {
+    if (location.origin !== origin) { return; }
+    try {
+        Object.keys(items).forEach(function (key) { localStorage.setItem(key, items[key]); });
+    } catch (e) {}
+})(%s, %s);
+"""
+
+_lock = threading.Lock()
+_cache = {"path": None, "mtime": None, "state": None}
+
+
+def _is_consent_key(name):
+    return any(marker in name.lower() for marker in CONSENT_MARKERS)
+
+
+def load_state(path, max_age_seconds):
+    """Returns the saved state, or None when it is missing, from another version or too old"""
+    with _lock:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if _cache["path"] != path or _cache["mtime"] != mtime:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = None
+            _cache.update(path=path, mtime=mtime, state=state)
+        state = _cache["state"]
+    if not state or state.get("version") != STATE_VERSION or state.get("stale"):
+        return None
+    if time.time() - state.get("captured_at", 0) > max_age_seconds:
+        return None
+    return state
+
+
+def save_state(path, state):
+    """Writes the state file atomically"""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def mark_stale(path):
+    """Flags the state file so no session injects it until a fresh copy is captured"""
+    with _lock:
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+    state["stale"] = True
+    save_state(path, state)
+
+
+def capture_state(driver):
+    """Collects the consent cookies and localStorage entries of the current page"""
+    cookies = [cookie for cookie in driver.get_cookies() if _is_consent_key(cookie["name"])]
+    storage = driver.execute_script("""
+        var items = {};
+        for (var i = 0; i < localStorage.length; i++) {
+            var key = localStorage.key(i);
+            items[key] = localStorage.getItem(key);
+        }
+        return {origin: location.origin, items: items};
+    """)
+    return {
+        "version": STATE_VERSION,
+        "captured_at": time.time(),
+        "origin": storage["origin"],
+        "cookies": cookies,
+        "local_storage": {key: value for key, value in storage["items"].items() if _is_consent_key(key)},
+    }
+
+
+def apply_state(driver, state):
+    """Injects the state before the first navigation; returns the id of the storage script"""
+    cookies = []
+    for cookie in state["cookies"]:
+        injected = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly") if key in cookie}
+        if "expiry" in cookie:
+            injected["expires"] = cookie["expiry"]
+        if "sameSite" in cookie:
+            injected["sameSite"] = cookie["sameSite"]
+        if "domain" not in injected:
+            injected["url"] = state["origin"]
+        cookies.append(injected)
+    if cookies:
+        execute_cdp(driver, "Network.setCookies", {"cookies": cookies})
+    if not state.get("local_storage"):
+        return None
+    source = _LOCAL_STORAGE_SCRIPT % (json.dumps(state["origin"]), json.dumps(state["local_storage"]))
+    identifier = execute_cdp(driver, "Page.addScriptToEvaluateOnNewDocument", {"source": source})["identifier"]
+    # Tracked on the driver so a session can be cleaned up even when the step that seeded it failed
+    driver._tt4i_storage_scripts = getattr(driver, "_tt4i_storage_scripts", set()) | {identifier}
+    return identifier
+
+
+def remove_storage_script(driver, identifier):
+    """Stops re-injecting localStorage once the first page has loaded"""
+    if identifier:
+        execute_cdp(driver, "Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+        driver._tt4i_storage_scripts = getattr(driver, "_tt4i_storage_scripts", set()) - {identifier}
+
+
+def remove_storage_scripts(driver):
+    """Removes every storage script still installed on the driver"""
+    for identifier in list(getattr(driver, "_tt4i_storage_scripts", ())):
+        remove_storage_script(driver, identifier)
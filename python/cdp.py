@@ -0,0 +1,7 @@
+# Chrome DevTools Protocol over the remote grid
+# webdriver.Remote has no execute_cdp_cmd, but the Chrome remote connection exposes
+# chromedriver's goog/cdp/execute endpoint as the "executeCdpCommand" command.
+
+def execute_cdp(driver, cmd, params=None):
+    """Runs a CDP command in the session's current target and returns its result"""
+    return driver.execute("executeCdpCommand", {"cmd": cmd, "params": params or {}})["value"]
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from preflight import ConnectionPool
+
+# Conditional execution
+# The QA job list changes a few times a day, so the full browser scenario only
+# runs when a cheap fingerprint of the positions feed changes, the last verified
+# run failed, or the verified result is older than the maximum staleness. The
+# feed is fetched with ETag/Last-Modified validators; a 304 keeps the previous
+# fingerprint without downloading the body.
+
+STATE_VERSION = 1
+
+# Public Lever postings feed behind the careers page, limited to the QA team
+POSITIONS_FEED_URL = "https://api.lever.co/v0/postings/useinsider?mode=json&team=Quality%20Assurance"
+
+
+def fingerprint_postings(body):
+    """Hashes the fields the scenario checks, ignoring ordering and unrelated feed changes"""
+    try:
+        postings = json.loads(body)
+    except ValueError:
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+    if not isinstance(postings, list):
+        return hashlib.sha256(json.dumps(postings, sort_keys=True).encode("utf-8")).hexdigest()
+    rows = sorted(
+        [posting.get("id"), posting.get("text"), posting.get("categories", {}).get("team"),
+         posting.get("categories", {}).get("location"), posting.get("hostedUrl")]
+        for posting in postings
+    )
+    return hashlib.sha256(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+class ChangeDetector:
+    """Decides whether the next session needs a browser, based on the feed fingerprint and the last verified run"""
+
+    def __init__(self, url=POSITIONS_FEED_URL, max_staleness=3600, path=None, pool=None, pending_timeout=None,
+                 log=print):
+        self.url = url
+        self.max_staleness = max_staleness
+        self.pending_timeout = pending_timeout  # Seconds after which a session that never reported is given up on
+        self.path = path  # Optional file that keeps the verified result across restarts
+        self.pool = pool or ConnectionPool()
+        self.log = log
+        self._lock = threading.Lock()
+        self._validators = {}  # ETag / Last-Modified of the last feed response
+        self._fingerprint = None
+        self._verified = self._load()  # {"fingerprint", "verified_at"} of the last passed run
+        self._pending = None  # Fingerprint a running session is verifying
+        self._pending_session = None  # Number of that session; results of other sessions are ignored
+        self._pending_since = None
+
+    def _load(self):
+        if not self.path:
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("version") == STATE_VERSION and state.get("fingerprint") else None
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(self._verified or {}, version=STATE_VERSION), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def fingerprint(self):
+        """Fetches the feed conditionally and returns its fingerprint"""
+        headers = {}
+        if "etag" in self._validators:
+            headers["If-None-Match"] = self._validators["etag"]
+        if "last-modified" in self._validators:
+            headers["If-Modified-Since"] = self._validators["last-modified"]
+        status, body, response_headers = self.pool.request(self.url, headers)
+        if status == 304 and self._fingerprint:
+            return self._fingerprint
+        if status >= 400:
+            raise ValueError(f"Positions feed returned HTTP {status}")
+        self._validators = {name: response_headers[name] for name in ("etag", "last-modified")
+                            if response_headers.get(name)}
+        self._fingerprint = fingerprint_postings(body)
+        return self._fingerprint
+
+    def skip_reason(self, session_no=None):
+        """Returns why session session_no can skip the browser run, or None when it has to run"""
+        with self._lock:
+            if self._pending is not None:
+                age = time.monotonic() - self._pending_since
+                if self.pending_timeout is None or age < self.pending_timeout:
+                    return "a session is already verifying the current job data"
+                # Its result never arrived (e.g. the session died before reporting), so verify again
+                self.log(f"⚠️ No result from the session verifying the job data after {age:.0f}s, running a new one")
+            try:
+                fingerprint = self.fingerprint()
+            except Exception as e:
+                # Without a fingerprint nothing is known about the data, so the full scenario runs
+                self.log(f"⚠️ Could not fingerprint the positions feed, running the full scenario: {e}")
+                fingerprint = ""
+            verified = self._verified
+            if verified and fingerprint and verified["fingerprint"] == fingerprint:
+                age = time.time() - verified["verified_at"]
+                if age < self.max_staleness:
+                    return f"job data unchanged, last verified {age:.0f}s ago"
+            self._pending = fingerprint
+            self._pending_session = session_no
+            self._pending_since = time.monotonic()
+            return None
+
+    def record(self, result):
+        """Result listener: a passed run becomes the verified result, a failed one forces the next run"""
+        if result.skipped:
+            return
+        with self._lock:
+            if self._pending is None or result.session_no != self._pending_session:
+                return  # A late result of a session whose pending verification already expired
+            fingerprint, self._pending = self._pending, None
+            self._verified = {"fingerprint": fingerprint, "verified_at": time.time()} if result.ok and fingerprint else None
+            self._save()
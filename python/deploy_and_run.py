@@ -1,7 +1,24 @@
 import os
+import sys
+import json
 import time
+import shlex
+import argparse
+import threading
 import subprocess
-import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Deploy engine
+# Applies the manifests concurrently, each one as soon as its dependencies are
+# met: the HPA once the Deployment it scales exists, the test-controller once
+# the selenium-chrome Service has a ready endpoint. Readiness comes from one
+# `kubectl get endpoints --watch` stream instead of polling, and every event is
+# reported with the time since the start. Non-interactive; point --kubectl at
+# fake_kubectl.py to try it without a cluster.
+#
+#   python deploy_and_run.py --cluster eks-cluster
+#   python deploy_and_run.py --file test-controller=my-controller.yaml --timeout 600
+#   python deploy_and_run.py --kubectl "python fake_kubectl.py"
 
 DEFAULT_YAML_FILES = {
     "chrome-node": "../yaml/chrome-node.yaml",
@@ -9,115 +26,285 @@ DEFAULT_YAML_FILES = {
     "test-controller": "../yaml/test-controller.yaml"
 }
 
-def run_command(command):
-    result = subprocess.run(command, capture_output=True, text=True)
-    return result.stdout.strip()
-
-def check_eks_cluster():
-    print("\nChecking available EKS clusters...")
-    clusters = run_command(["aws", "eks", "list-clusters", "--output", "json"])
-    clusters_json = json.loads(clusters)
-    
-    if not clusters_json["clusters"]:
-        print("No EKS clusters found. Exiting.")
-        exit(1)
-    
-    cluster_list = clusters_json["clusters"]
-    
-    print("\nAvailable clusters:")
-    for i, cluster in enumerate(cluster_list, start=1):
-        print(f"{i}) {cluster}")
-    
-    while True:
+
+class DeployError(Exception):
+    """A kubectl command failed or a resource did not become ready in time"""
+
+
+class Stage:
+    """One manifest and the conditions it waits for"""
+
+    def __init__(self, name, path, after=(), needs=(), ready=()):
+        self.name = name
+        self.path = path
+        self.after = tuple(after)  # Stages that must have been applied first
+        self.needs = tuple(needs)  # Services that need a ready endpoint before the manifest is applied
+        self.ready = tuple(ready)  # Services whose endpoints must all be ready for the stage to be done
+
+
+def default_stages(paths):
+    """The tt4i manifests and their dependency edges; paths maps stage name to manifest path"""
+    return [
+        Stage("chrome-node", paths["chrome-node"], ready=["selenium-chrome"]),
+        # The HPA only needs its scale target to exist
+        Stage("chrome-node-hpa", paths["chrome-node-hpa"], after=["chrome-node"]),
+        # The controller starts routing sessions to chrome pods right away
+        Stage("test-controller", paths["test-controller"], needs=["selenium-chrome"], ready=["test-controller"]),
+    ]
+
+
+class Kubectl:
+    """Runs kubectl (or a stand-in) without a shell"""
+
+    def __init__(self, command="kubectl", namespace=None):
+        self.base = shlex.split(command) + (["--namespace", namespace] if namespace else [])
+
+    def run(self, *args):
         try:
-            selection = int(input("\nSelect the cluster number to use: ").strip())
-            if 1 <= selection <= len(cluster_list):
-                selected_cluster = cluster_list[selection - 1]
-                print(f"Using cluster: {selected_cluster}")
-                return selected_cluster
-            else:
-                print("Invalid selection. Please enter a valid number.")
-        except ValueError:
-            print("Invalid input. Please enter a number.")
+            result = subprocess.run(self.base + list(args), capture_output=True, text=True)
+        except OSError as e:
+            raise DeployError(f"Could not run {self.base[0]}: {e}") from e
+        if result.returncode != 0:
+            output = result.stderr.strip() or result.stdout.strip() or f"exit code {result.returncode}"
+            raise DeployError(f"kubectl {' '.join(args)} failed: {output}")
+        return result.stdout
 
-def configure_kubeconfig(cluster):
-    print("\nSetting up kubeconfig for the cluster...")
-    run_command(["aws", "eks", "update-kubeconfig", "--name", cluster])
-    print("Kubeconfig updated.")
+    def apply(self, path):
+        """Applies a manifest and returns the kind/name of every object in it"""
+        output = json.loads(self.run("apply", "-f", path, "-o", "json"))
+        items = output.get("items", [output]) if output.get("kind") == "List" else [output]
+        return [f"{item['kind']}/{item['metadata']['name']}" for item in items]
 
-def get_yaml_files():
-    print("\nBy default, the following YAML files will be used:")
-    script_dir = os.path.dirname(os.path.realpath(__file__))
-    default_paths = {key: os.path.abspath(os.path.join(script_dir, value)) for key, value in DEFAULT_YAML_FILES.items()}
+    def watch_endpoints(self):
+        return subprocess.Popen(self.base + ["get", "endpoints", "--watch", "--output-watch-events", "-o", "json"],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
-    for key, path in default_paths.items():
-        print(f" - {key}: {path}")
 
-    use_default = input("\nDo you want to use these default YAML files? (yes/no): ").strip().lower()
+def endpoint_counts(endpoints):
+    """(ready, not ready) address counts of an Endpoints object"""
+    subsets = endpoints.get("subsets") or []
+    return (sum(len(subset.get("addresses") or []) for subset in subsets),
+            sum(len(subset.get("notReadyAddresses") or []) for subset in subsets))
 
-    if use_default == "yes":
-        return list(default_paths.values())
-    else:
-        yaml_files = {}
-        for key, default_path in default_paths.items():
-            custom_path = input(f"Enter path for {key} YAML file (or press Enter to use default: {default_path}): ").strip()
-            yaml_files[key] = custom_path if custom_path else default_path
 
-        return list(yaml_files.values())
+def read_events(stream):
+    """Yields the JSON watch events of a stream; kubectl prints them pretty-printed, one after another"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    for line in stream:
+        buffer += line
+        text = buffer.lstrip()
+        while text:
+            try:
+                event, end = decoder.raw_decode(text)
+            except ValueError:
+                break  # Incomplete object, read more lines
+            yield event
+            text = text[end:].lstrip()
+        buffer = text
 
-def apply_kubernetes_resources(yaml_files):
-    print("\nDeploying Kubernetes resources...")
 
-    deployment_order = [
-        "../yaml/chrome-node.yaml",
-        "../yaml/chrome-node-hpa.yaml",
-        "../yaml/test-controller.yaml"
-    ]
-    
+class EndpointsWatch:
+    """Ready/not-ready address counts per Service, kept current by a single watch stream"""
+
+    def __init__(self, kubectl, on_change=None, log=print):
+        self.kubectl = kubectl
+        self.on_change = on_change  # Called with (service, ready, not_ready) on every change
+        self.log = log
+        self.endpoints = {}
+        self.error = None  # Set when the watch cannot run at all; waiters raise it instead of timing out
+        self._cond = threading.Condition()
+        self._process = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="endpoints-watch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _fail(self, message):
+        with self._cond:
+            self.error = DeployError(message)
+            self._cond.notify_all()
+
+    def _run(self):
+        watched = False  # Whether any watch ever worked; a kubectl that fails right away is not retried
+        while not self._stopped:
+            try:
+                self._process = self.kubectl.watch_endpoints()
+            except OSError as e:
+                self._fail(f"Could not start the endpoints watch: {e}")
+                return
+            for event in read_events(self._process.stdout):
+                watched = True
+                endpoints = event.get("object", {})
+                name = endpoints.get("metadata", {}).get("name")
+                counts = (0, 0) if event.get("type") == "DELETED" else endpoint_counts(endpoints)
+                with self._cond:
+                    changed = self.endpoints.get(name) != counts
+                    self.endpoints[name] = counts
+                    # Reported before waiters wake up, so the log stays in event order
+                    if changed and self.on_change and not self._stopped:
+                        self.on_change(name, *counts)
+                    self._cond.notify_all()
+            self._process.wait()
+            if self._process.returncode and not self._stopped:
+                output = self._process.stderr.read().strip()
+                if not watched:
+                    self._fail(f"Endpoints watch failed: {output or f'exit code {self._process.returncode}'}")
+                    return
+                self.log(f"Endpoints watch failed: {output}")
+            if not self._stopped:
+                # The API server ends watches after a while; a failing kubectl is retried more slowly
+                time.sleep(1 if self._process.returncode == 0 else 5)
+
+    def wait(self, predicate, timeout):
+        """Waits until predicate(endpoints) is true; returns False on timeout and raises when the watch failed"""
+        with self._cond:
+            ready = self._cond.wait_for(lambda: self.error is not None or predicate(self.endpoints), timeout)
+            if self.error is not None:
+                raise self.error
+            return ready
+
+    def has_ready_endpoint(self, service, timeout):
+        return self.wait(lambda endpoints: endpoints.get(service, (0, 0))[0] > 0, timeout)
+
+    def all_ready(self, service, timeout):
+        return self.wait(lambda endpoints: endpoints.get(service, (0, 0))[0] > 0
+                         and endpoints[service][1] == 0, timeout)
+
+    def stop(self):
+        self._stopped = True
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+
+
+class DeployEngine:
+    """Applies stages concurrently along their dependency edges and waits until they are ready"""
+
+    def __init__(self, stages, kubectl, timeout=300, log=print):
+        self.stages = stages
+        self.kubectl = kubectl
+        self.timeout = timeout
+        self.log = log
+        self.start = None
+        self.timings = {}  # stage name -> {"applied": seconds since start, "ready": seconds since start}
+        self._applied = {stage.name: threading.Event() for stage in stages}
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def report(self, message):
+        self.log(f"[+{self.elapsed():6.1f}s] {message}")
+
+    def _remaining(self):
+        return max(0.0, self.timeout - self.elapsed())
+
+    def _run_stage(self, stage, watch):
+        try:
+            for name in stage.after:
+                if not self._applied[name].wait(self._remaining()) or name not in self.timings:
+                    raise DeployError(f"{stage.name} was not applied because {name} was not")
+            for service in stage.needs:
+                self.report(f"{stage.name} waits for a ready {service} endpoint")
+                provider = next((other for other in self.stages if service in other.ready), None)
+                while not watch.has_ready_endpoint(service, min(1.0, self._remaining())):
+                    if provider and self._applied[provider.name].is_set() and provider.name not in self.timings:
+                        raise DeployError(f"{service} gets no endpoints because {provider.name} was not applied")
+                    if not self._remaining():
+                        raise DeployError(f"{service} has no ready endpoint, {stage.name} was not applied")
+            started = time.monotonic()
+            objects = self.kubectl.apply(stage.path)
+            self.timings[stage.name] = {"applied": self.elapsed()}
+            self.report(f"Applied {stage.name} in {time.monotonic() - started:.1f}s: {', '.join(objects)}")
+        finally:
+            self._applied[stage.name].set()  # Dependents fail fast instead of waiting for the timeout
+        for service in stage.ready:
+            if not watch.all_ready(service, self._remaining()):
+                raise DeployError(f"{service} endpoints were not ready within {self.timeout}s")
+        self.timings[stage.name]["ready"] = self.elapsed()
+        self.report(f"✅ {stage.name} is ready")
+
+    def run(self):
+        """Deploys every stage; returns True when all are ready"""
+        self.start = time.monotonic()
+        watch = EndpointsWatch(self.kubectl, on_change=lambda service, ready, not_ready: self.report(
+            f"Endpoints {service}: {ready} ready, {not_ready} not ready"), log=self.report)
+        watch.start()
+        failed = []
+        try:
+            with ThreadPoolExecutor(max_workers=len(self.stages), thread_name_prefix="stage") as pool:
+                futures = {stage.name: pool.submit(self._run_stage, stage, watch) for stage in self.stages}
+                for name, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed.append(name)
+                        self.report(f"❌ {name}: {e}")
+        finally:
+            watch.stop()
+        self.log(self.format_timings())
+        return not failed
+
+    def format_timings(self):
+        lines = ["Stage timings (seconds since start):"]
+        for stage in self.stages:
+            timing = self.timings.get(stage.name, {})
+            applied = f"{timing['applied']:.1f}" if "applied" in timing else "-"
+            ready = f"{timing['ready']:.1f}" if "ready" in timing else "-"
+            lines.append(f"  {stage.name:<16} applied {applied:>6}  ready {ready:>6}")
+        lines.append(f"Total: {self.elapsed():.1f}s")
+        return "\n".join(lines)
+
+
+def configure_kubeconfig(cluster):
+    print(f"Setting up kubeconfig for EKS cluster {cluster}...")
+    result = subprocess.run(["aws", "eks", "update-kubeconfig", "--name", cluster], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise DeployError(f"aws eks update-kubeconfig failed: {result.stderr.strip()}")
+    print("Kubeconfig updated.")
+
+
+def parse_files(overrides):
+    """Default manifest paths, with name=path overrides applied"""
     script_dir = os.path.dirname(os.path.realpath(__file__))
-    file_map = {os.path.basename(path): path for path in yaml_files}
-
-    for file in deployment_order:
-        if os.path.basename(file) in file_map:
-            print(f"Applying {file_map[os.path.basename(file)]}...")
-            run_command(["kubectl", "apply", "-f", file_map[os.path.basename(file)]])
-            print(f"Applied: {file_map[os.path.basename(file)]}")
-
-            if file.endswith("chrome-node-hpa.yaml"):
-                print("Waiting 10 seconds before deploying test-controller...")
-                time.sleep(10)
-
-def wait_for_pods_ready(label_selector, timeout=120):
-    print(f"\nWaiting for pods with label {label_selector} to become ready...")
-    start_time = time.time()
-    
-    while time.time() - start_time < timeout:
-        result = run_command(["kubectl", "get", "pods", "-l", label_selector, "-o", "json"])
-        pods = json.loads(result)
-        
-        all_ready = all(
-            any(cond["type"] == "Ready" and cond["status"] == "True" for cond in pod["status"].get("conditions", []))
-            for pod in pods.get("items", [])
-        )
-        
-        if all_ready:
-            print(f"All {label_selector} pods are ready!")
-            return True
-        
-        print("Pods are not ready yet. Retrying in 5 seconds...")
-        time.sleep(5)
-    
-    print(f"Timeout reached. {label_selector} pods are still not ready.")
-    return False
+    paths = {name: os.path.abspath(os.path.join(script_dir, path)) for name, path in DEFAULT_YAML_FILES.items()}
+    for override in overrides:
+        name, _, path = override.partition("=")
+        if name not in paths or not path:
+            raise ValueError(f"Expected one of {', '.join(paths)}=PATH, got {override!r}")
+        paths[name] = os.path.abspath(path)
+    return paths
 
-if __name__ == "__main__":
-    selected_cluster = check_eks_cluster()
-    configure_kubeconfig(selected_cluster)
-    
-    yaml_files = get_yaml_files()
-    apply_kubernetes_resources(yaml_files)
 
-    if wait_for_pods_ready("app=test-controller") and wait_for_pods_ready("app=chrome-node"):
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deploy the tt4i manifests and wait until they are ready")
+    parser.add_argument("--cluster", help="EKS cluster to configure kubeconfig for; default is the current context")
+    parser.add_argument("--namespace", help="Namespace to deploy into; default is the context's namespace")
+    parser.add_argument("--file", action="append", default=[], metavar="NAME=PATH",
+                        help=f"Override a manifest ({', '.join(DEFAULT_YAML_FILES)})")
+    parser.add_argument("--kubectl", default=os.getenv("KUBECTL", "kubectl"),
+                        help="kubectl command, e.g. 'python fake_kubectl.py' for a dry run")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds until every stage must be ready")
+    args = parser.parse_args(argv)
+    try:
+        paths = parse_files(args.file)
+    except ValueError as e:
+        parser.error(str(e))
+
+    engine = DeployEngine(default_stages(paths), Kubectl(args.kubectl, args.namespace), args.timeout)
+    try:
+        if args.cluster:
+            configure_kubeconfig(args.cluster)
+        ready = engine.run()
+    except DeployError as e:
+        print(e)
+        return 1
+    if ready:
         print("All required pods are ready! Test-controller will handle test execution.")
-    else:
-        print("Pods did not become ready. Exiting.")
+        return 0
+    print("Deployment did not become ready.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
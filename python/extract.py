@@ -0,0 +1,123 @@
+from selenium.webdriver.common.by import By
+
+# Bulk extraction
+# Reads whole lists or several elements in one execute_script round trip instead
+# of one find_element/.text command per value.
+
+# Shared locator resolution; locators are [kind, value] pairs with kind "css" or "xpath", optionally
+# followed by a text the element must contain
+_FIND_JS = """
+function tt4iFind(root, locator, all) {
+    if (locator[2]) {
+        var matches = tt4iFind(root, [locator[0], locator[1]], true).filter(function (el) {
+            return (el.innerText || el.textContent || '').indexOf(locator[2]) !== -1;
+        });
+        return all ? matches : (matches[0] || null);
+    }
+    if (locator[0] === 'xpath') {
+        var type = all ? XPathResult.ORDERED_NODE_SNAPSHOT_TYPE : XPathResult.FIRST_ORDERED_NODE_TYPE;
+        var result = document.evaluate(locator[1], root, null, type, null);
+        if (!all) { return result.singleNodeValue; }
+        var nodes = [];
+        for (var i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+        return nodes;
+    }
+    return all ? Array.prototype.slice.call(root.querySelectorAll(locator[1])) : root.querySelector(locator[1]);
+}
+function tt4iVisible(el) {
+    var style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none' && el.getClientRects().length > 0;
+}
+function tt4iValue(el, attr) {
+    if (!el) { return null; }
+    if (!attr) { return (el.innerText || el.textContent || '').trim(); }
+    return el[attr] !== undefined ? el[attr] : el.getAttribute(attr);
+}
+"""
+
+ROWS_SCRIPT = _FIND_JS + """
+var fields = arguments[1];
+return tt4iFind(document, arguments[0], true).map(function (row) {
+    var out = {};
+    Object.keys(fields).forEach(function (name) {
+        var field = fields[name];
+        var el = field.locator ? null : row;
+        for (var i = 0; field.locator && i < field.locator.length && !el; i++) {
+            el = tt4iFind(row, field.locator[i], false);
+        }
+        out[name] = tt4iValue(el, field.attr);
+    });
+    return out;
+});
+"""
+
+ELEMENTS_SCRIPT = _FIND_JS + """
+var locators = arguments[0];
+var out = {};
+Object.keys(locators).forEach(function (name) {
+    var el = null, candidate = -1;
+    for (var i = 0; i < locators[name].length && !el; i++) {
+        el = tt4iFind(document, locators[name][i], false);
+        candidate = el ? i : -1;
+    }
+    out[name] = {present: !!el, visible: !!el && tt4iVisible(el), text: tt4iValue(el, null), candidate: candidate};
+});
+return out;
+"""
+
+# Returns the first element matched by any of the candidate locators, with the state a click needs
+FIRST_SCRIPT = _FIND_JS + """
+var candidates = arguments[0];
+for (var i = 0; i < candidates.length; i++) {
+    var el = tt4iFind(arguments[1] || document, candidates[i], false);
+    if (el) {
+        return {element: el, candidate: i, visible: tt4iVisible(el), enabled: !el.disabled};
+    }
+}
+return null;
+"""
+
+
+def to_js_locator(locator):
+    """Converts a Selenium (By, value) locator to the [kind, value] pair used by the scripts"""
+    by, value = locator
+    if by == By.XPATH:
+        return ["xpath", value]
+    if by == By.ID:
+        return ["css", f'[id="{value}"]']
+    if by == By.CLASS_NAME:
+        return ["css", f".{value}"]
+    if by == By.NAME:
+        return ["css", f'[name="{value}"]']
+    if by in (By.CSS_SELECTOR, By.TAG_NAME):
+        return ["css", value]
+    raise ValueError(f"Unsupported locator strategy for bulk extraction: {by}")
+
+
+def extract_rows(driver, row_locator, fields):
+    """Returns one dict per row matched by row_locator, in a single round trip.
+
+    fields maps a column name to a (By, value) locator or registry Locator
+    relative to the row, a (locator, attribute) pair to read a property such as
+    "href", or None to read the row's own text.
+    """
+    spec = {}
+    for name, field in fields.items():
+        locator, attr = (field if isinstance(field, tuple) and not isinstance(field[0], str) else (field, None))
+        spec[name] = {"locator": js_candidates(locator) if locator else None, "attr": attr}
+    return driver.execute_script(ROWS_SCRIPT, to_js_locator(row_locator), spec)
+
+
+def js_candidates(locator):
+    """Candidate list for the scripts: a registry Locator's precompiled candidates or a single (By, value)"""
+    return getattr(locator, "js", None) or [to_js_locator(locator)]
+
+
+def read_elements(driver, locators):
+    """Returns presence, visibility, text and the matching candidate index (-1 if none) of several named elements in a single round trip"""
+    return driver.execute_script(ELEMENTS_SCRIPT, {name: js_candidates(loc) for name, loc in locators.items()})
+
+
+def find_first(driver, candidates, root=None):
+    """Returns {"element", "candidate", "visible", "enabled"} for the first matching candidate, or None"""
+    return driver.execute_script(FIRST_SCRIPT, candidates, root)
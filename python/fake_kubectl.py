@@ -0,0 +1,114 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+# Fake kubectl
+# A stand-in for the kubectl commands deploy_and_run.py uses, so the deploy
+# engine can be exercised without a cluster. `apply` records when each manifest
+# was applied in a state directory; `get endpoints --watch` streams Endpoints
+# events as if the pods of each applied Deployment started and passed their
+# readiness probe after FAKE_READY_SECONDS.
+#
+#   python fake_kubectl.py reset
+#   python deploy_and_run.py --kubectl "python fake_kubectl.py"
+#   FAKE_FAIL=chrome-node-hpa FAKE_READY_SECONDS=5 python deploy_and_run.py --kubectl "python fake_kubectl.py"
+
+STATE_DIR = os.getenv("FAKE_KUBECTL_STATE", os.path.join(tempfile.gettempdir(), "tt4i-fake-kubectl"))
+APPLY_SECONDS = float(os.getenv("FAKE_APPLY_SECONDS", "0.5"))  # Latency of kubectl apply
+STARTING_SECONDS = float(os.getenv("FAKE_STARTING_SECONDS", "1"))  # Until a pod shows up as not ready
+READY_SECONDS = float(os.getenv("FAKE_READY_SECONDS", "3"))  # Until a pod passes its readiness probe
+FAIL = os.getenv("FAKE_FAIL", "")  # Manifest name (without .yaml) whose apply fails
+
+
+def manifest_objects(path):
+    """kind and metadata.name of every document in a manifest, good enough for the tt4i manifests"""
+    objects = []
+    with open(path, encoding="utf-8") as f:
+        for document in f.read().split("\n---"):
+            kind = re.search(r"^kind:\s*(\S+)", document, re.M)
+            name = re.search(r"^metadata:\s*\n\s+name:\s*(\S+)", document, re.M)
+            if kind and name:
+                objects.append({"kind": kind.group(1), "metadata": {"name": name.group(1)}})
+    return objects
+
+
+def applied_services():
+    """Service name -> time its manifest was applied"""
+    services = {}
+    if not os.path.isdir(STATE_DIR):
+        return services
+    for entry in os.listdir(STATE_DIR):
+        if not entry.endswith(".json"):
+            continue
+        with open(os.path.join(STATE_DIR, entry), encoding="utf-8") as f:
+            state = json.load(f)
+        for obj in state["objects"]:
+            if obj["kind"] == "Service":
+                services[obj["metadata"]["name"]] = state["applied_at"]
+    return services
+
+
+def apply(path):
+    time.sleep(APPLY_SECONDS)
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name == FAIL:
+        print(f'error: error validating "{path}": injected failure', file=sys.stderr)
+        return 1
+    objects = manifest_objects(path)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp_path = os.path.join(STATE_DIR, f".{name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"applied_at": time.time(), "objects": objects}, f)
+    os.replace(tmp_path, os.path.join(STATE_DIR, f"{name}.json"))  # The watch never reads a partial file
+    print(json.dumps({"apiVersion": "v1", "kind": "List", "items": objects}, indent=4))
+    return 0
+
+
+def endpoints(name, applied_at, now):
+    address = {"ip": "10.0.0.10"}
+    subset = {"ports": [{"port": 4444, "protocol": "TCP"}]}
+    if now - applied_at >= READY_SECONDS:
+        subset["addresses"] = [address]
+    elif now - applied_at >= STARTING_SECONDS:
+        subset["notReadyAddresses"] = [address]
+    return {"apiVersion": "v1", "kind": "Endpoints", "metadata": {"name": name},
+            "subsets": [subset] if len(subset) > 1 else None}
+
+
+def watch_endpoints():
+    sent = {}
+    while True:
+        now = time.time()
+        for name, applied_at in applied_services().items():
+            current = endpoints(name, applied_at, now)
+            if sent.get(name) != current:
+                event = {"type": "ADDED" if name not in sent else "MODIFIED", "object": current}
+                print(json.dumps(event, indent=4), flush=True)
+                sent[name] = current
+        time.sleep(0.2)
+
+
+def main(argv):
+    args = list(argv)
+    if "--namespace" in args:
+        del args[args.index("--namespace"):args.index("--namespace") + 2]
+    if args[:1] == ["reset"]:
+        shutil.rmtree(STATE_DIR, ignore_errors=True)
+        return 0
+    if args[:1] == ["apply"]:
+        return apply(args[args.index("-f") + 1])
+    if args[:2] == ["get", "endpoints"] and "--watch" in args:
+        watch_endpoints()
+    print(f"fake_kubectl: unsupported command {' '.join(argv)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except KeyboardInterrupt:
+        sys.exit(130)
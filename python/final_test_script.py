@@ -2,17 +2,80 @@ import sys
 import os  
 import time
 import datetime
+import signal
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from tabulate import tabulate  # Required for printing tables
-from selenium.common.exceptions import SessionNotCreatedException
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException
+from concurrent.futures import ThreadPoolExecutor
+from scheduler import SessionScheduler, SessionResult
+from instrumentation import InstrumentedRemote, add_command_listener, add_session_listener
+from session_supervisor import SessionSupervisor
+from node_router import NodeRouter, KubernetesEndpoints, static_endpoints
+from session_queue import SessionQueue
+from multiplex import MultiplexedSession, IsolationError
+from scenario_dag import Step, ScenarioDag, DagRunner
+import metrics
+import tracing
+from session_pool import SessionPool
+from request_filter import apply_lean_profile, apply_step_rules
+import browser_state
+import har_replay
+from preflight import PreflightChecker, ProbeTarget
+from change_detection import ChangeDetector
+from results_store import ResultsStore
+from retry_policy import RetryPolicy, SESSION_CREATE_POLICY, session_deadline, current_deadline, is_fatal
+from extract import extract_rows
+from locators import (HOME, CAREERS, QA_CAREERS, OPEN_POSITIONS, resolve, resolve_all, clickable, present,
+                      add_lookup_listener, format_stats, STATS as LOCATOR_STATS)
+from waits import (StepBudget, wait_until, wait_for_page_settled, wait_for_dom_quiet,
+                   wait_for_animations, wait_for_stable_text)
 
 # 1️⃣ Configuration
 SELENIUM_REMOTE_URL = os.getenv("SELENIUM_REMOTE_URL", "http://selenium-chrome:4444/wd/hub")
 HEADLESS_MODE = True  # If set to False, Windowed mode will be enabled
+SESSION_CONCURRENCY = int(os.getenv("SESSION_CONCURRENCY", "1"))  # Sessions kept in flight at once
+RUN_INTERVAL = int(os.getenv("RUN_INTERVAL", "10"))  # Seconds each worker waits between sessions
+USE_SESSION_POOL = os.getenv("USE_SESSION_POOL", "true").lower() == "true"  # Reuse warm sessions between runs
+POOL_MAX_RUNS = int(os.getenv("POOL_MAX_RUNS", "20"))  # Runs before a pooled session is recycled
+POOL_MAX_MEMORY_MB = int(os.getenv("POOL_MAX_MEMORY_MB", "512"))  # JS heap size that forces a recycle
+POOL_MAX_AGE = int(os.getenv("POOL_MAX_AGE", "1800"))  # Seconds before a pooled session is recycled
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8080"))  # Prometheus /metrics endpoint, 0 disables it
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # JSON-lines span output for trace_report.py, empty disables tracing
+LEAN_PROFILE = os.getenv("LEAN_PROFILE", "true").lower() == "true"  # Chrome without images, media and background work
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() == "true"  # Per-step CDP request blocking
+USE_BROWSER_STATE = os.getenv("USE_BROWSER_STATE", "true").lower() == "true"  # Inject saved consent state
+BROWSER_STATE_FILE = os.getenv("BROWSER_STATE_FILE", "/tmp/tt4i-browser-state.json")
+BROWSER_STATE_MAX_AGE = int(os.getenv("BROWSER_STATE_MAX_AGE", str(7 * 24 * 3600)))  # Seconds before the state is recaptured
+SESSION_DEADLINE = int(os.getenv("SESSION_DEADLINE", "180"))  # Seconds a whole session may take before it gives up
+REPLAY_HAR = os.getenv("REPLAY_HAR", "")  # HAR recorded by har_replay.py; when set, Chrome is served from it
+REPLAY_PORT = int(os.getenv("REPLAY_PORT", "8443"))
+REPLAY_ADDRESS = os.getenv("REPLAY_ADDRESS", f"test-controller:{REPLAY_PORT}")  # How Chrome nodes reach the replay server
+REPLAY_CERT_FILE = os.getenv("REPLAY_CERT_FILE", "")
+REPLAY_KEY_FILE = os.getenv("REPLAY_KEY_FILE", "")
+PREFLIGHT = os.getenv("PREFLIGHT", "true").lower() == "true" and not REPLAY_HAR  # HTTP probe of the live sites before each session
+PREFLIGHT_CACHE_SECONDS = float(os.getenv("PREFLIGHT_CACHE_SECONDS", "5"))  # Concurrent sessions share one probe result for this long
+INCREMENTAL_MODE = os.getenv("INCREMENTAL_MODE", "false").lower() == "true" and not REPLAY_HAR  # Run the browser only when the job data changed
+MAX_STALENESS = int(os.getenv("MAX_STALENESS", "3600"))  # Seconds a verified result is trusted while the job data is unchanged
+CHANGE_STATE_FILE = os.getenv("CHANGE_STATE_FILE", "/tmp/tt4i-verified-jobs.json")
+RESULTS_DB = os.getenv("RESULTS_DB", "/tmp/tt4i-results.db")  # SQLite run history, empty disables it
+RESULTS_RETENTION_DAYS = int(os.getenv("RESULTS_RETENTION_DAYS", "90"))
+REAP_ORPHANS = os.getenv("REAP_ORPHANS", "true").lower() == "true"  # Delete grid sessions no worker owns
+ORPHAN_GRACE = int(os.getenv("ORPHAN_GRACE", "60"))  # Seconds an unknown grid session may live before it is deleted
+REAP_INTERVAL = int(os.getenv("REAP_INTERVAL", "30"))  # Seconds between grid /status checks
+NODE_DISCOVERY = os.getenv("NODE_DISCOVERY", "")  # "kubernetes" or "static" routes sessions to free nodes, empty uses the Service
+SELENIUM_NODE_URLS = os.getenv("SELENIUM_NODE_URLS", "")  # Comma-separated node URLs for NODE_DISCOVERY=static
+CHROME_SERVICE_NAME = os.getenv("CHROME_SERVICE_NAME", "selenium-chrome")  # Service whose Endpoints list the nodes
+NODE_STATUS_INTERVAL = float(os.getenv("NODE_STATUS_INTERVAL", "2"))  # Seconds node capacity is cached
+GRID_SLOTS = int(os.getenv("GRID_SLOTS", "0"))  # Grid capacity when nodes are not discovered; 0 disables queueing
+QUEUE_MAX_DEPTH = int(os.getenv("QUEUE_MAX_DEPTH", "50"))  # Waiting session requests before new ones are rejected
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "120"))  # Seconds a request may wait for a grid slot
+MULTIPLEX_LANES = int(os.getenv("MULTIPLEX_LANES", "1"))  # Scenario instances run side by side in one browser session
+MULTIPLEX_ISOLATION = os.getenv("MULTIPLEX_ISOLATION", "context")  # "context" (own cookies/storage per lane) or "window"
+SCENARIO_SESSIONS = int(os.getenv("SCENARIO_SESSIONS", "1"))  # Sessions one run may use; >1 runs independent branches in parallel
 
 options = webdriver.ChromeOptions()
 options.add_argument("--ignore-certificate-errors")  
@@ -26,416 +89,654 @@ options.add_argument("--window-size=1920,1080")
 options.add_argument("--disable-notifications")
 options.add_argument("--no-sandbox")
 options.add_argument("--disable-dev-shm-usage")
+if LEAN_PROFILE:
+    apply_lean_profile(options)
+if MULTIPLEX_LANES > 1:
+    # Lanes interleave their waits, so navigation returns early and windows in the background keep running
+    options.page_load_strategy = "eager"
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+
+# Routes new sessions to the least-loaded chrome node instead of a random Service backend
+router = None
+if NODE_DISCOVERY == "kubernetes":
+    router = NodeRouter(KubernetesEndpoints(CHROME_SERVICE_NAME), refresh_interval=NODE_STATUS_INTERVAL,
+                        log=lambda message: log_message(message))
+elif NODE_DISCOVERY == "static":
+    router = NodeRouter(static_endpoints(SELENIUM_NODE_URLS.split(",")), refresh_interval=NODE_STATUS_INTERVAL,
+                        log=lambda message: log_message(message))
+
+# The running SessionScheduler; branch sessions of a scenario go through its queue and pool
+scheduler = None
+
+QA_CAREERS_URL = "https://useinsider.com/careers/quality-assurance/"
+
+# Elements that must be visible on the Careers page
+CAREERS_REQUIRED_ELEMENTS = {
+    "'See all teams' button": CAREERS.see_all_teams,
+    "'Our Locations' header": CAREERS.our_locations,
+    "'Life at Insider' header": CAREERS.life_at_insider,
+}
+
+# Columns read from every job listing row
+JOB_FIELDS = {
+    "title": (By.CLASS_NAME, "position-title"),
+    "department": (By.CLASS_NAME, "position-department"),
+    "location": (By.CLASS_NAME, "position-location"),
+    "view_role_url": (OPEN_POSITIONS.view_role, "href"),
+}
+
+# Upstream pages the scenario depends on and a marker each must contain
+PREFLIGHT_TARGETS = [
+    ProbeTarget("home", "https://useinsider.com/", ["Insider"]),
+    ProbeTarget("qa_careers", QA_CAREERS_URL, ["See all QA jobs"]),
+    ProbeTarget("lever", "https://jobs.lever.co/useinsider", max_latency=8.0),
+]
+
+# Timeout budget (seconds) for each step; every wait inside a step draws from it
+STEP_BUDGETS = {
+    "visit_home_page": 30,
+    "navigate_to_careers_page": 20,
+    "verify_required_elements": 20,
+    "navigate_to_qa_jobs": 30,
+    "filter_jobs": 45,
+    "verify_jobs": 30,
+    "click_view_role_button": 30,
+}
+
+# Retry policy for each step (exponential backoff with jitter, fatal errors are not retried)
+STEP_POLICIES = {
+    "visit_home_page": RetryPolicy(max_attempts=3),
+    "navigate_to_careers_page": RetryPolicy(max_attempts=3),
+    "verify_required_elements": RetryPolicy(max_attempts=3),
+    "navigate_to_qa_jobs": RetryPolicy(max_attempts=3),
+    "filter_jobs": RetryPolicy(max_attempts=3, base_delay=1.0),
+    "verify_jobs": RetryPolicy(max_attempts=2),
+    "click_view_role_button": RetryPolicy(max_attempts=2),
+}
 
 # 2. Steps
 
 ## Step 1: Visit the Home page and verify it loads
-def visit_home_page():
-    retries = 3
-    for attempt in range(retries):
+def visit_home_page(driver):
+    def attempt(budget):
+        log_message("🔄 Opening Home page...")
+        seeded = seed_consent_state(driver)  # Inject saved consent cookies before the first navigation
         try:
-            log_message("🔄 Opening Home page...")
             driver.get("https://useinsider.com/")
-            wait_for_page_load(driver, timeout=10)  # Wait for the page to fully load
-            accept_cookies()  # Call the function to accept cookies
-            assert "Insider" in driver.title  # Verify that the title is correct
-            log_message("✅ Home page successfully loaded.")
-            break
-        except Exception as e:
-            if attempt < retries - 1:
-                log_message(f"⚠️ Retry {attempt + 1} failed, retrying...")
-                time.sleep(2)
-            else:
-                log_message(f"❌ Home page loading failed after {retries} attempts: {e}")
-                
-# Step 2: Navigate to the "Careers" page
-def navigate_to_careers_page():
-    retries = 3
-    for attempt in range(retries):
-        try:
-            log_message("🔄 Navigating to Careers page...")
-            
-            # Click on the "Company" dropdown menu
-            company_menu = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//a[@href='#'][contains(text(), 'Company')]"))
-            )
-            company_menu.click()  # Click on the dropdown menu
-            time.sleep(2)  # Wait for the menu to open
-            
-            # Click on the "Careers" link from the dropdown
-            careers_link = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Careers')]"))
-            )
-            careers_link.click()  # Click on the "Careers" link
-            
-            # Wait for the page to load
-            wait_for_page_load(driver, timeout=5)
-
-            # Verify that the Careers page has fully loaded
-            log_message("✅ Careers page successfully loaded.")
-            break
-        except Exception as e:
-            if attempt < retries - 1:
-                log_message(f"⚠️ Retry {attempt + 1} failed, retrying...")
-                time.sleep(2)
-            else:
-                log_message(f"❌ Failed to navigate to Careers page: {e}")
-
-# Step 3: Verify required elements on the Careers page
-def verify_required_elements():
-    retries = 3
-    for attempt in range(retries):
-        try:
-            log_message("🔄 Verifying required elements on the Careers page...")
-
-            # Step 1: Ensure the page is fully loaded
-            wait_for_page_load(driver, timeout=10)
-            time.sleep(1)  # Give it an additional second for stability
-
-            # Step 2: Scroll to the bottom of the page
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)  # Wait for the scroll to finish
-            
-            # Step 3: Verify the "See all teams" button is present
-            teams_button = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//a[contains(text(), 'See all teams')]"))
-            )
-            assert teams_button.is_displayed(), "'See all teams' button is not visible"
-            log_message("✅ 'See all teams' button is visible.")
-
-            time.sleep(0.5)  # Wait 0.5 seconds before moving to the next element
-
-            # Step 4: Verify "Our Locations" is present
-            locations_header = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//h3[contains(text(), 'Our Locations')]"))
-            )
-            assert locations_header.is_displayed(), "'Our Locations' header is not visible"
-            log_message("✅ 'Our Locations' header is visible.")
-
-            time.sleep(0.5)  # Wait 0.5 seconds before moving to the next element
-
-            # Step 5: Verify "Life at Insider" is present
-            life_header = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//h2[contains(text(), 'Life at Insider')]"))
-            )
-            assert life_header.is_displayed(), "'Life at Insider' header is not visible"
-            log_message("✅ 'Life at Insider' header is visible.")
+            wait_for_page_load(driver, timeout=10, budget=budget)  # Wait for the page to fully load
+        finally:
+            # The storage script is only needed for the first page; a failed attempt must not leave it behind
+            remove_seed_script(driver, seeded)
+        handle_consent(driver, seeded, budget)  # Skip the banner or fall back to accepting cookies
+        assert "Insider" in driver.title  # Verify that the title is correct
+        log_message("✅ Home page successfully loaded.")
 
-            time.sleep(0.5)  # Wait 0.5 seconds after verification
+    return run_step("visit_home_page", attempt)
 
-            log_message("✅ All required elements are visible on the Careers page.")
-            break
-        except Exception as e:
-            if attempt < retries - 1:
-                log_message(f"⚠️ Retry {attempt + 1} failed, retrying...")
-                time.sleep(2)
-            else:
-                log_message(f"❌ Failed to verify elements: {e}")
+# Step 2: Navigate to the "Careers" page
+def navigate_to_careers_page(driver):
+    def attempt(budget):
+        log_message("🔄 Navigating to Careers page...")
 
-# Step 4: Go to 'See all QA jobs' page
-def navigate_to_qa_jobs():
-    retries = 3
-    for attempt in range(retries):
-        try:
-            log_message("🔄 Navigating to QA Jobs page...")
+        # Click on the "Company" dropdown menu
+        company_menu = wait_until(driver, clickable(HOME.company_menu), budget)
+        company_menu.click()  # Click on the dropdown menu
+        wait_for_animations(driver, budget)  # Wait for the menu to open
 
-            # Go to the Quality Assurance careers page
-            driver.get("https://useinsider.com/careers/quality-assurance/")
-            wait_for_page_load(driver, timeout=10)
-            time.sleep(0.5)  # Allow time for page load
+        # Click on the "Careers" link from the dropdown
+        careers_link = wait_until(driver, clickable(HOME.careers_link), budget)
+        careers_link.click()  # Click on the "Careers" link
 
-            log_message("🔄 Clicking 'See all QA jobs' button...")
+        # Wait for the page to load
+        wait_for_page_load(driver, timeout=10, budget=budget)
 
-            # Click the 'See all QA jobs' button
-            see_all_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'See all QA jobs')]"))
-            )
-            see_all_button.click()  # Click the button
+        # Verify that the Careers page has fully loaded
+        log_message("✅ Careers page successfully loaded.")
 
-            log_message("✅ 'See all QA jobs' button clicked. Waiting for the new page to load...")
+    return run_step("navigate_to_careers_page", attempt)
 
-            # Wait for the new page to load (new page with jobs list)
-            wait_for_page_load(driver, timeout=10)
-            time.sleep(0.5)  # Allow time for page load
+# Step 3: Verify required elements on the Careers page
+def verify_required_elements(driver):
+    def attempt(budget):
+        log_message("🔄 Verifying required elements on the Careers page...")
 
-            log_message("✅ Successfully navigated to the QA jobs list page.")
-            break
-        except Exception as e:
-            if attempt < retries - 1:
-                log_message(f"⚠️ Retry {attempt + 1} failed, retrying...")
-                time.sleep(2)
-            else:
-                log_message(f"❌ Failed to navigate to 'See all QA jobs' page: {e}")
+        # Step 1: Ensure the page is fully loaded
+        wait_for_page_load(driver, timeout=10, budget=budget)
 
-# Step 5: Apply filters and check job listings
-def filter_jobs():
-    log_message("⏳ Waiting 5 seconds before checking department filter...")
-    time.sleep(5)  # 🔹 Waiting 5 seconds to ensure the page fully loads
+        # Step 2: Scroll to the bottom of the page
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_for_dom_quiet(driver, budget)  # Wait for lazy-loaded sections to render
 
-    retries = 7
-    for attempt in range(retries):
-        try:
-            log_message(f"🔄 Checking if Department filter is selected... (Attempt {attempt + 1})")
+        # Step 3: Verify "See all teams", "Our Locations" and "Life at Insider" together in one read
+        elements = wait_for_elements(driver, CAREERS_REQUIRED_ELEMENTS, budget)
+        for name, element in elements.items():
+            assert element["visible"], f"{name} is not visible"
+            log_message(f"✅ {name} is visible.")
 
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "select2-filter-by-department-container"))
-            )
+        log_message("✅ All required elements are visible on the Careers page.")
 
-            # **Read the value of the Department filter**
-            department_element = driver.find_element(By.ID, "select2-filter-by-department-container")
-            selected_department = department_element.text.strip()
+    return run_step("verify_required_elements", attempt)
 
-            # **If there is an "×" symbol, clean it**
-            if "×" in selected_department:
-                selected_department = selected_department.split("×")[-1].strip()
+# Step 4: Go to 'See all QA jobs' page
+def navigate_to_qa_jobs(driver):
+    def attempt(budget):
+        # The scenario runner opens the Quality Assurance careers page (the step's start_url);
+        # a retry after the click already left it goes back there
+        if not driver.current_url.startswith(QA_CAREERS_URL):
+            log_message("🔄 Navigating to QA Jobs page...")
+            driver.get(QA_CAREERS_URL)
+            wait_for_page_load(driver, timeout=10, budget=budget)
 
-            log_message(f"🔍 Final read from department filter: {selected_department}")  # ✅ DEBUG LOG
+        log_message("🔄 Clicking 'See all QA jobs' button...")
 
-            if selected_department == "Quality Assurance":
-                log_message("✅ Department filter successfully detected!")
-                break  
+        # Click the 'See all QA jobs' button
+        see_all_button = wait_until(driver, clickable(QA_CAREERS.see_all_qa_jobs), budget)
+        see_all_button.click()  # Click the button
 
-        except Exception as e:
-            log_message(f"⚠️ Department filter not detected yet: {e}")
+        log_message("✅ 'See all QA jobs' button clicked. Waiting for the new page to load...")
 
-        time.sleep(2)
+        # Wait for the new page to load (new page with jobs list)
+        wait_for_page_load(driver, timeout=15, budget=budget)
 
-    # **✅ Mandatory Manual Application of Location Filter (Based on Previous Experience)**
-    log_message("🔄 Ensuring 'Istanbul, Turkiye' appears in the filter...")
+        log_message("✅ Successfully navigated to the QA jobs list page.")
 
-    for attempt in range(3):  # Attempt up to 3 times
-        dropdown = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//span[@aria-labelledby='select2-filter-by-location-container']"))
-        )
-        dropdown.click()
-        time.sleep(2)
+    return run_step("navigate_to_qa_jobs", attempt)
 
-        options = driver.find_elements(By.XPATH, "//li[contains(text(), 'Istanbul, Turkiye')]")
-        if options:
+# Step 5: Apply filters and check job listings
+def filter_jobs(driver):
+    def attempt(budget):
+        log_message("🔄 Waiting for the Department filter to settle on 'Quality Assurance'...")
+        try:
+            # **Read the value of the Department filter, ignoring the "×" clear symbol**
+            selected_department = wait_for_stable_text(
+                driver, OPEN_POSITIONS.department_filter.primary,
+                lambda text: text.split("×")[-1].strip() == "Quality Assurance", budget, timeout=20
+            )
+            log_message(f"🔍 Final read from department filter: {selected_department.split('×')[-1].strip()}")  # ✅ DEBUG LOG
+            log_message("✅ Department filter successfully detected!")
+        except TimeoutException as e:
+            log_message(f"⚠️ Department filter not detected: {e}")
+
+        # **✅ Mandatory Manual Application of Location Filter (Based on Previous Experience)**
+        log_message("🔄 Ensuring 'Istanbul, Turkiye' appears in the filter...")
+        location = resolve_all(driver, {"location": OPEN_POSITIONS.location_filter})["location"]
+        if "Istanbul, Turkiye" in (location["text"] or ""):
+            log_message("✅ 'Istanbul, Turkiye' is already selected.")
+        else:
+            dropdown = wait_until(driver, clickable(OPEN_POSITIONS.location_dropdown), budget)
+            dropdown.click()
+            try:
+                # Wait for select2 to render the location options
+                option = wait_until(driver, clickable(OPEN_POSITIONS.istanbul_option), budget, timeout=5)
+            except TimeoutException:
+                driver.find_element(By.TAG_NAME, "body").click()  # Close the dropdown before the next attempt
+                raise
             log_message("📍 Found option: Istanbul, Turkiye")
-            options[0].click()
+            option.click()
             log_message("✅ Selected 'Istanbul, Turkiye'.")
-            break  # Exit if successful
-        else:
-            log_message(f"⚠️ Attempt {attempt + 1}: 'Istanbul, Turkiye' not found, retrying...")
-            driver.find_element(By.TAG_NAME, "body").click()
-            time.sleep(2)
-    else:
-        log_message("❌ Failed to select 'Istanbul, Turkiye'.")
-        driver.quit()
-        exit()
-
-    # **🔄 Wait 5 seconds after applying filters**
-    log_message("⏳ Waiting 5 seconds after filters are applied...")
-    time.sleep(5)
-
-    # **🔄 Finally, check the 'Showing' section**
-    wait_for_valid_showing()
-
-    log_message("✅ Filters applied successfully!")
-
-# Step 6: Verify job list and check positions
-def verify_jobs():
-    log_message("⏳ Waiting 5 seconds to ensure filters are applied...")
-    time.sleep(5)
 
-    # **Step 1: Scroll down and up**
-    log_message("🔄 Scrolling down...")
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
+        # **🔄 Wait for the filtered list to be fetched and rendered**
+        log_message("⏳ Waiting for the job list to settle after filters are applied...")
+        wait_for_page_settled(driver, budget, timeout=15)
 
-    log_message("🔄 Scrolling up...")
-    driver.execute_script("window.scrollTo(0, 0);")
-    time.sleep(2)
+        # **🔄 Finally, check the 'Showing' section**
+        wait_for_valid_showing(driver, budget)
 
-    # **Step 2: Re-check the 'Showing' section**
-    log_message("🔄 Re-checking 'Showing' section after scrolling...")
+        log_message("✅ Filters applied successfully!")
 
-    showing_valid = False
-    showing_text = ""
-
-    for attempt in range(10):  # Attempt up to 10 times
-        try:
-            showing_text = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "resultCounter"))
-            ).text
-
-            log_message(f"🔍 Attempt {attempt + 1} - Read from 'Showing' section: {showing_text}")
-
-            if "NaN" not in showing_text and "Showing" in showing_text:
-                showing_valid = True
-                break
-        except:
-            log_message("⚠️ 'Showing' section not found, retrying...")
-        time.sleep(0.5)
-
-    if not showing_valid:
-        log_message("❌ 'Showing' section did not resolve after retries!")
-        return
-
-    # **Step 3: Collect job listings dynamically into an array**
-    log_message("🔄 Checking job listings...")
-    
-    job_list = []  # Main array where jobs are stored
-    job_retries = 10
-    for attempt in range(job_retries):
-        job_elements = driver.find_elements(By.CLASS_NAME, "position-list-item")
-        
-        for job in job_elements:
-            job_title = job.find_element(By.CLASS_NAME, "position-title").text.strip()
-            job_department = job.find_element(By.CLASS_NAME, "position-department").text.strip()
-            job_location = job.find_element(By.CLASS_NAME, "position-location").text.strip()
+    return run_step("filter_jobs", attempt)
 
+# Step 6: Verify job list and check positions
+def verify_jobs(driver):
+    def collect_jobs(d):
+        # All rows (title, department, location, View Role link) are read in a single round trip
+        job_list = [
+            job for job in extract_rows(d, OPEN_POSITIONS.job_row.primary, JOB_FIELDS)
             # **For filtering: Only include locations that contain "Turkey" or "Turkiye"**
-            if "Turkey" in job_location or "Turkiye" in job_location:
-                job_list.append([job_title, job_department, job_location])  # Store in array format
-                log_message(f"✅ Job added: {job_title} | {job_department} | {job_location}")
-        
-        # **Exit if enough jobs have been found**
-        if len(job_list) >= 4:
-            break
-        else:
-            log_message(f"⚠️ Not enough valid jobs found ({len(job_list)}), retrying...")
-            time.sleep(0.5)
-
-    if len(job_list) >= 4:
+            if job["location"] and ("Turkey" in job["location"] or "Turkiye" in job["location"])
+        ]
+        # **Done once enough jobs have been rendered**
+        return job_list if len(job_list) >= 4 else False
+
+    def attempt(budget):
+        # **Step 1: Scroll down and up**
+        log_message("🔄 Scrolling down...")
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_for_dom_quiet(driver, budget)
+
+        log_message("🔄 Scrolling up...")
+        driver.execute_script("window.scrollTo(0, 0);")
+        wait_for_dom_quiet(driver, budget)
+
+        # **Step 2: Re-check the 'Showing' section**
+        log_message("🔄 Re-checking 'Showing' section after scrolling...")
+        showing_text = wait_for_stable_text(driver, OPEN_POSITIONS.result_counter.primary, is_valid_showing, budget)
+        log_message(f"🔍 Read from 'Showing' section: {showing_text}")
+
+        # **Step 3: Collect job listings dynamically into an array**
+        log_message("🔄 Checking job listings...")
+        job_list = wait_until(driver, collect_jobs, budget, message="Could not find 4 valid jobs")
+
+        for job in job_list:
+            log_message(f"✅ Job added: {job['title']} | {job['department']} | {job['location']}")
+        driver._tt4i_jobs = job_list  # Stored in the run history by run_scenario
         log_message("✅ Successfully gathered 4 unique jobs!")
 
         # **📌 PRINT JOB LIST AS A TABLE**
         print("\n📌 Latest found QA jobs in Turkey:\n")
-        print(tabulate(job_list[:4], headers=["Job Name", "Department", "Location"], tablefmt="pretty"))
+        rows = [[job["title"], job["department"], job["location"]] for job in job_list[:4]]
+        print(tabulate(rows, headers=["Job Name", "Department", "Location"], tablefmt="pretty"))
+
+    return run_step("verify_jobs", attempt)
 
-    else:
-        log_message("❌ Could not find 4 valid jobs after retries!")
-       
 # Step 7: Click "View Role" button and verify redirection
-def click_view_role_button():
-    log_message("🔄 Hovering over the first job to activate 'View Role' button...")
-    
-    try:
+def click_view_role_button(driver):
+    def attempt(budget):
+        log_message("🔄 Hovering over the first job to activate 'View Role' button...")
+
         # Locate the first job listing element
-        first_job = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "position-list-item"))
-        )
+        first_job = wait_until(driver, present(OPEN_POSITIONS.job_row), budget)
 
         # Perform a mouse hover to activate the 'View Role' button
         ActionChains(driver).move_to_element(first_job).perform()
-        time.sleep(1)
+        wait_for_animations(driver, budget)  # Wait for the hover transition
 
         # Locate the 'View Role' button
-        view_role_button = first_job.find_element(By.XPATH, ".//a[contains(text(), 'View Role')]")
+        view_role_button = resolve(driver, OPEN_POSITIONS.view_role, root=first_job)
 
         # Click using JavaScript (as a precaution)
         log_message("🔄 Clicking 'View Role' for the first job...")
+        handles_before = set(driver.window_handles)
         driver.execute_script("arguments[0].click();", view_role_button)
-        time.sleep(3)  # Wait for the new page to load
 
         # Wait for the new tab to open
-        WebDriverWait(driver, 10).until(EC.number_of_windows_to_be(2))
-        driver.switch_to.window(driver.window_handles[1])
+        new_handles = wait_until(
+            driver, lambda d: set(d.window_handles) - handles_before, budget, message="No new tab opened"
+        )
+        driver.switch_to.window(new_handles.pop())
         log_message("✅ Switched to the new tab.")
+        if BLOCK_RESOURCES:
+            # Blocking is per tab and only starts now: requests the Lever tab sent while it opened are not blocked
+            driver._tt4i_blocked_urls = None
+            try:
+                apply_step_rules(driver, "click_view_role_button")
+            except Exception as e:
+                log_message(f"⚠️ Could not apply request blocking in the new tab: {e}")
 
         # Wait for the redirected page to fully load
-        wait_for_page_load(driver, timeout=10)
+        wait_for_page_load(driver, timeout=10, budget=budget)
 
         # Validate the URL
         current_url = driver.current_url
         assert "jobs.lever.co" in current_url, f"❌ Unexpected URL: {current_url}"
         log_message(f"✅ Successfully redirected to Lever job page: {current_url}")
 
-    except Exception as e:
-        log_message(f"❌ Failed to click 'View Role' and verify redirection: {e}")
+    return run_step("click_view_role_button", attempt)
 
 # 3. Mechanisms and Helper Functions
 
+# Run a step under its retry policy and the session deadline
+def run_step(name, attempt):
+    """Runs attempt(budget) with retries; returns True on success and False once retries are exhausted.
+
+    Fatal errors (lost session, exceeded session deadline) are raised so the session ends at once.
+    """
+    deadline = current_deadline()
+
+    def run_attempt(number):
+        tracing.set_attribute("attempt", number)
+        seconds = STEP_BUDGETS[name]
+        budget = StepBudget(name, min(seconds, deadline.remaining()) if deadline else seconds)
+        return attempt(budget)
+
+    def on_retry(number, error, delay):
+        metrics.STEP_RETRIES.labels(step=name).inc()
+        log_message(f"⚠️ {name} attempt {number} failed ({type(error).__name__}), retrying in {delay:.1f}s...")
+
+    policy = STEP_POLICIES[name]
+    try:
+        policy.run(run_attempt, deadline, on_retry)
+        return True
+    except Exception as e:
+        if is_fatal(e):
+            log_message(f"❌ {name} failed fatally: {e}")
+            raise
+        log_message(f"❌ {name} failed after {policy.max_attempts} attempts: {e}")
+        return False
+
 # Accept cookies
-def accept_cookies():
+def accept_cookies(driver, budget=None):
     try:
         log_message("🔄 Checking for cookie popup...")
-        accept_button = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.ID, "wt-cli-accept-all-btn"))
-        )
+        accept_button = wait_until(driver, clickable(HOME.cookie_accept), budget, timeout=5)
         accept_button.click()
         log_message("✅ Accepted cookies.")
-        time.sleep(5)
+        # Wait for the banner to be dismissed instead of a fixed pause
+        wait_until(driver, EC.invisibility_of_element_located(HOME.cookie_accept.primary), budget, timeout=5)
+        return True
     except:
         log_message("⚠️ No cookie banner found or already accepted.")
+        return False
+
+# Inject the saved consent state
+def seed_consent_state(driver):
+    """Applies the saved consent cookies and localStorage; returns the seeding info or None"""
+    if not USE_BROWSER_STATE:
+        return None
+    state = browser_state.load_state(BROWSER_STATE_FILE, BROWSER_STATE_MAX_AGE)
+    if not state:
+        return None
+    try:
+        script_id = browser_state.apply_state(driver, state)
+        log_message("🍪 Injected saved consent state.")
+        return {"script_id": script_id}
+    except Exception as e:
+        log_message(f"⚠️ Could not inject consent state: {e}")
+        return None
+
+# Stop re-injecting the seeded localStorage on later documents
+def remove_seed_script(driver, seeded):
+    if seeded:
+        try:
+            browser_state.remove_storage_script(driver, seeded["script_id"])
+        except Exception as e:
+            log_message(f"⚠️ Could not remove the consent storage script: {e}")
+
+# Skip the cookie banner when the injected state was accepted, otherwise click through it
+def handle_consent(driver, seeded, budget=None):
+    if seeded:
+        banner = resolve_all(driver, {"banner": HOME.cookie_accept})["banner"]
+        if not banner["visible"]:
+            log_message("✅ Consent state accepted, cookie banner skipped.")
+            return
+        log_message("⚠️ Injected consent state is stale, falling back to the cookie banner...")
+        browser_state.mark_stale(BROWSER_STATE_FILE)
+    if accept_cookies(driver, budget) and USE_BROWSER_STATE:
+        try:
+            browser_state.save_state(BROWSER_STATE_FILE, browser_state.capture_state(driver))
+            log_message("💾 Captured fresh consent state.")
+        except Exception as e:
+            log_message(f"⚠️ Could not capture consent state: {e}")
         
 # Page loading check function
-def wait_for_page_load(driver, timeout=10):
-    """Waits for the page to fully load"""
-    WebDriverWait(driver, timeout).until(
-        lambda d: d.execute_script("return document.readyState") == "complete"
-    )
+def wait_for_page_load(driver, timeout=10, budget=None):
+    """Waits for the page to fully load and settle"""
+    wait_until(driver, lambda d: d.execute_script("return document.readyState") == "complete", budget, timeout)
     log_message("✅ Page fully loaded.")
-    time.sleep(2)  # Wait for 2 seconds after full page load
+    # Wait for late XHRs, DOM updates and animations instead of a fixed pause
+    try:
+        wait_for_page_settled(driver, budget, timeout)
+    except TimeoutException:
+        log_message("⚠️ Page is still busy, continuing.")
 
 # Log message function
 def log_message(message):
-    """Logs each step with a timestamp"""
-    print(f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
-
-def wait_for_valid_showing():
-    retries = 5
-    for attempt in range(retries):
+    """Logs each step with a timestamp and the session it belongs to"""
+    session = threading.current_thread().name
+    prefix = f"[{session}] " if session.startswith("session-") else ""
+    print(f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {prefix}{message}")
+
+def wait_for_elements(driver, locators, budget=None, timeout=10):
+    """Waits until all named elements are present, reading them in one round trip per poll"""
+    def all_present(d):
+        elements = resolve_all(d, locators)
+        return elements if all(element["present"] for element in elements.values()) else False
+
+    return wait_until(driver, all_present, budget, timeout, f"Missing elements: {', '.join(locators)}")
+
+def is_valid_showing(showing_text):
+    """Checks that the 'Showing' counter has been populated"""
+    return "NaN" not in showing_text and "Showing" in showing_text
+
+def wait_for_valid_showing(driver, budget=None):
+    # A valid value must also stay unchanged, otherwise the list is still being filtered
+    showing_text = wait_for_stable_text(driver, OPEN_POSITIONS.result_counter.primary, is_valid_showing, budget, timeout=15)
+    log_message(f"✅ 'Showing' section is valid: {showing_text}")
+
+
+
+# 4. Test Execution
+
+# The careers page checks and the QA jobs path only share the Home page visit (and its consent cookies)
+SCENARIO = ScenarioDag([
+    Step(visit_home_page, provides=["consent"]),
+    Step(navigate_to_careers_page, after="visit_home_page"),
+    Step(verify_required_elements, after="navigate_to_careers_page"),
+    Step(navigate_to_qa_jobs, after="visit_home_page", requires=["consent"],
+         start_url=QA_CAREERS_URL),
+    Step(filter_jobs, after="navigate_to_qa_jobs"),
+    Step(verify_jobs, after="filter_jobs"),
+    Step(click_view_role_button, after="verify_jobs"),
+])
+
+def create_driver():
+    """Creates a dedicated remote WebDriver session, retrying with backoff while the grid has no free slot"""
+    def attempt(number):
+        url = SELENIUM_REMOTE_URL
+        if router:
+            url = router.acquire()
+            if url is None:
+                if router.nodes():
+                    raise SessionNotCreatedException("No chrome node has a free slot")
+                url = SELENIUM_REMOTE_URL  # Discovery found nothing, let the Service pick a node
+        start = time.monotonic()
         try:
-            showing_text = driver.find_element(By.ID, "resultCounter").text.strip()
-            log_message(f"🔍 Read from 'Showing' section: {showing_text}")
-
-            # Check for NaN values
-            if "NaN" not in showing_text and "Showing" in showing_text:
-                log_message(f"✅ 'Showing' section is valid: {showing_text}")
-                return  # If a valid value appears, terminate the process
-
+            driver = InstrumentedRemote(command_executor=url, options=options)
         except Exception as e:
-            log_message(f"⚠️ 'Showing' section not found yet: {e}")
-
-        log_message(f"⚠️ 'Showing' section invalid (Attempt {attempt + 1}), retrying...")
-        time.sleep(2)
-
-    log_message("❌ 'Showing' section still invalid after retries.")
-
-
-
-# 4. Test Completion
-log_message("✅ Test completed successfully.")
-log_message("🔄 Keeping browser open for further inspection...")
-
-# Run steps sequentially
-# 🔄 **Infinite loop - test sequence runs continuously inside the same browser session**
-
-max_retries = 5
-retry_delay = 10
-
-while True:
-    print("🔄 Starting a new test session...")
-
-    retries = 0
-    while retries < max_retries:
+            metrics.SESSION_CREATE_DURATION.labels(result="error").observe(time.monotonic() - start)
+            if router:
+                router.release(url, ok=False, error=e)
+            raise
+        metrics.SESSION_CREATE_DURATION.labels(result="ok").observe(time.monotonic() - start)
+        driver._tt4i_node_url = url  # Where a failed quit is retried as a direct DELETE
+        if router:
+            router.release(url, ok=True)
+        log_message("✅ WebDriver session created successfully.")
+        return driver
+
+    def on_retry(number, error, delay):
+        log_message(f"⚠️ Session creation failed. Retrying in {delay:.1f} seconds... "
+                    f"({number}/{SESSION_CREATE_POLICY.max_attempts})")
+
+    return SESSION_CREATE_POLICY.run(attempt, on_retry=on_retry)
+
+def preflight_failures(checker):
+    """Probes the upstream sites and returns the ones that are down; degraded sites are only logged"""
+    down, degraded = checker.failures()
+    if down:
+        log_message(f"🌐 Upstream check failed, skipping the browser session: {'; '.join(down)}")
+    elif degraded:
+        log_message(f"⚠️ Upstream check found problems, running the browser session anyway: {'; '.join(degraded)}")
+    return down
+
+def notify(listeners, result):
+    """Passes a finished session to every result listener"""
+    for listener in listeners:
+        try:
+            listener(result)
+        except Exception as e:
+            log_message(f"⚠️ Result listener {getattr(listener, '__name__', listener)} failed: {type(e).__name__}: {e}")
+
+def record_history(store, result):
+    """Stores the session in the run history and logs only the positions that changed since the last run"""
+    diff = store.record(result)
+    for job in diff["added"]:
+        log_message(f"🆕 New position: {job['title']} | {job['department']} | {job['location']}")
+    for job in diff["removed"]:
+        log_message(f"➖ Position removed: {job['title']} | {job['department']} | {job['location']}")
+
+def run_scenario(driver, result, after_step=None, sessions=None):
+    """Runs the scenario DAG within the session deadline and records each step outcome in result.
+
+    Independent branches run on up to `sessions` sessions (SCENARIO_SESSIONS by default). A failed
+    step skips the steps that depend on it, so the session ends early and its Chrome node is freed.
+    """
+    log_message("🔄 Starting a new test session...")
+    driver._tt4i_jobs = None
+    if REPLAY_HAR:
+        tag_replay_client(driver)
+    max_sessions = SCENARIO_SESSIONS if sessions is None else sessions
+    # Captured state is only needed to seed branch sessions; a single session keeps it in the browser
+    states = {"consent": (browser_state.capture_state, browser_state.apply_state)} if max_sessions > 1 else None
+    acquire, release = create_driver, quit_driver
+    if scheduler is not None:
+        acquire = lambda: scheduler.open_session(timeout=max(STEP_BUDGETS.values()))
+        release = scheduler.close_session
+    if REPLAY_HAR:
+        open_session = acquire
+        acquire = lambda: tag_replay_client(open_session())
+    runner = DagRunner(SCENARIO, acquire=acquire, release=release, navigate=open_start_url, states=states,
+                       max_sessions=max_sessions, step_budget=lambda step: STEP_BUDGETS[step.name], log=log_message)
+
+    def execute(d, step, call):
+        if BLOCK_RESOURCES:
+            try:
+                apply_step_rules(d, step.name)
+            except Exception as e:
+                log_message(f"⚠️ Could not apply request blocking for {step.name}: {e}")
+        started, start = time.time(), time.monotonic()
+        ok = False
         try:
-            driver = webdriver.Remote(command_executor=SELENIUM_REMOTE_URL, options=options)
-            print("✅ WebDriver session created successfully.")
-            break
-        except SessionNotCreatedException as e:
-            print(f"⚠️ Session creation failed. Retrying in {retry_delay} seconds... ({retries+1}/{max_retries})")
-            retries += 1
-            time.sleep(retry_delay)
-    else:
-        print("❌ Maximum retries reached. Restarting loop...")
-        continue  
+            with tracing.span(step.name, "step"):
+                ok = call()
+        finally:
+            result.record_step(step.name, ok, time.monotonic() - start, started)
+        if getattr(d, "_tt4i_jobs", None) is not None:
+            result.jobs = d._tt4i_jobs
+        if after_step:
+            after_step(d)
+        if not ok:
+            log_message(f"❌ {step.name} failed, skipping the steps that depend on it.")
+        return ok
+
+    with session_deadline(SESSION_DEADLINE):
+        runner.run(driver, execute)
+
+def tag_replay_client(driver):
+    """Gives the driver's tab its own replay sequence; returns the driver"""
+    try:
+        har_replay.tag_client(driver)
+    except Exception as e:
+        log_message(f"⚠️ Could not tag the session for replay, it shares the sequence of its address: {e}")
+    return driver
 
+def open_start_url(driver, url):
+    """Opens the page a scenario step starts on"""
+    log_message(f"🔄 Opening {url}...")
+    driver.get(url)
+    wait_for_page_load(driver, timeout=10)
+
+def quit_driver(driver, broken=False):
+    """Ends a session created for one branch of a scenario run"""
     try:
-        visit_home_page()
-        navigate_to_careers_page()
-        verify_required_elements()
-        navigate_to_qa_jobs()
-        filter_jobs()
-        verify_jobs()
-        click_view_role_button()
-        print("✅ Test session completed successfully.")
         driver.quit()
-    except Exception as e:
-        print(f"❌ Test session failed: {e}")
+    except Exception:
+        pass
+
+def run_multiplexed(driver, result):
+    """Runs MULTIPLEX_LANES independent scenario instances in separate windows of one session.
 
-    print("⏳ Waiting 10 seconds before restarting the test...")
-    time.sleep(10)
+    Each lane is reported as its own result (session N.lane); the windows and browser contexts are
+    closed afterwards so a pooled session is handed back with its original window only.
+    """
+    session = MultiplexedSession(driver, isolate=MULTIPLEX_ISOLATION == "context", log=log_message)
+    try:
+        lanes = []
+        for _ in range(MULTIPLEX_LANES):
+            try:
+                lanes.append(session.open_lane())
+            except IsolationError as e:
+                # Lanes sharing cookies and storage would interfere, so fewer lanes run instead
+                log_message(f"⚠️ Running {len(lanes)} of {MULTIPLEX_LANES} lanes, {e}")
+                break
+        result.lanes = [SessionResult(result.session_no, lane=i + 1) for i in range(len(lanes))]
+
+        def run_lane(i):
+            lane_result = result.lanes[i]
+            threading.current_thread().name = f"session-{lane_result.label}"
+            start = time.monotonic()
+            try:
+                run_scenario(lanes[i], lane_result, sessions=1)
+            except Exception as e:
+                lane_result.error = f"{type(e).__name__}: {e}"
+            lane_result.duration = time.monotonic() - start
+
+        with ThreadPoolExecutor(max_workers=len(lanes)) as pool:
+            list(pool.map(run_lane, range(len(lanes))))
+    finally:
+        session.close()
+
+# 🔄 **Infinite loop - SESSION_CONCURRENCY independent sessions run continuously**
+if __name__ == "__main__":
+    add_command_listener(metrics.record_command)
+    add_lookup_listener(metrics.record_lookup)
+    tracing.configure(TRACE_FILE)
+    add_command_listener(tracing.record_command)
+    supervisor = SessionSupervisor(SELENIUM_REMOTE_URL, orphan_grace=ORPHAN_GRACE, reap_interval=REAP_INTERVAL,
+                                   log=log_message, on_reap=lambda _: metrics.ORPHANS_REAPED.labels().inc(),
+                                   grid_urls=(lambda: router.nodes() or [SELENIUM_REMOTE_URL]) if router else None)
+    add_session_listener(supervisor.session_listener)
+    if REAP_ORPHANS:
+        supervisor.start()
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_PORT)
+        log_message(f"📈 Metrics available on :{METRICS_PORT}/metrics")
+    if REPLAY_HAR:
+        har_replay.start_replay_server(REPLAY_HAR, REPLAY_PORT, certfile=REPLAY_CERT_FILE or None,
+                                       keyfile=REPLAY_KEY_FILE or None)
+        har_replay.apply_replay(options, REPLAY_ADDRESS)
+        log_message(f"📼 Replaying {REPLAY_HAR} from {REPLAY_ADDRESS} instead of the live sites")
+
+    preflight = None
+    if PREFLIGHT:
+        checker = PreflightChecker(PREFLIGHT_TARGETS, cache_seconds=PREFLIGHT_CACHE_SECONDS,
+                                   on_results=metrics.record_probes)
+        preflight = lambda: preflight_failures(checker)
+
+    listeners = [metrics.record_session]
+    if RESULTS_DB:
+        store = ResultsStore(RESULTS_DB)
+        store.prune(time.time() - RESULTS_RETENTION_DAYS * 86400)
+        listeners.append(lambda result: record_history(store, result))
+        log_message(f"🗄️ Run history stored in {RESULTS_DB}")
+
+    gate = None
+    if INCREMENTAL_MODE:
+        detector = ChangeDetector(max_staleness=MAX_STALENESS, path=CHANGE_STATE_FILE, log=log_message,
+                                  pending_timeout=QUEUE_TIMEOUT + SESSION_DEADLINE)
+        gate = detector.skip_reason
+        listeners.append(detector.record)
+        log_message(f"🧮 Incremental mode: full runs only when the job data changes or every {MAX_STALENESS}s")
+
+    pool = None
+    if USE_SESSION_POOL:
+        pool = SessionPool(create_driver, SESSION_CONCURRENCY, max_runs=POOL_MAX_RUNS,
+                           max_memory_mb=POOL_MAX_MEMORY_MB, max_age=POOL_MAX_AGE, log=log_message)
+        pool.warm()
+    queue = None
+    if router or GRID_SLOTS:
+        queue = SessionQueue(router.capacity if router else lambda: GRID_SLOTS, max_depth=QUEUE_MAX_DEPTH,
+                             on_change=metrics.record_queue)
+    scenario = run_multiplexed if MULTIPLEX_LANES > 1 else run_scenario
+    scheduler = SessionScheduler(create_driver, scenario, concurrency=SESSION_CONCURRENCY,
+                                 interval=RUN_INTERVAL, log=log_message, pool=pool,
+                                 on_result=lambda result: notify(listeners, result), preflight=preflight, gate=gate,
+                                 queue=queue, queue_timeout=QUEUE_TIMEOUT)
+
+    def shutdown(signum, frame):
+        # Kubernetes sends SIGTERM before killing the pod; free the Chrome nodes right away
+        log_message("🛑 Shutting down, releasing all sessions...")
+        scheduler.stop()
+        supervisor.close()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        scheduler.run_forever()
+    finally:
+        if pool:
+            pool.close()
+        supervisor.close()
+        if LOCATOR_STATS.entries:
+            print(f"\n🔎 Locator lookups:\n{format_stats()}")
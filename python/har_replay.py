@@ -0,0 +1,261 @@
+import sys
+import ssl
+import json
+import uuid
+import base64
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from cdp import execute_cdp
+
+# HAR record/replay
+# Record mode captures every page, script and XHR response of a session from
+# Chrome's performance log into a HAR file. Replay mode serves those responses
+# from a local stand-in server that Chrome is pointed at through
+# --host-resolver-rules, so the suite can run without touching the live sites.
+#
+#   python har_replay.py record --out recording.har
+#   python har_replay.py serve recording.har --port 8443 --cert cert.pem --key key.pem
+#
+# The sites are HTTPS, so the replay server needs a certificate; a self-signed one
+# is enough because Chrome runs with --ignore-certificate-errors:
+#   openssl req -x509 -newkey rsa:2048 -nodes -subj /CN=replay -keyout key.pem -out cert.pem
+
+# Request header that tells the replay server which browser tab a request comes from
+CLIENT_HEADER = "X-Tt4i-Replay-Client"
+
+# Headers that describe the original transfer rather than the recorded body
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive",
+                   "strict-transport-security", "alt-svc"}
+
+
+def enable_recording(options):
+    """Turns on Chrome's network performance log, which the recorder reads"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return options
+
+
+def apply_replay(options, address):
+    """Resolves every host to the replay server at address (host:port)"""
+    options.add_argument(f"--host-resolver-rules=MAP * {address}, EXCLUDE localhost")
+    return options
+
+
+def tag_client(driver, client_id=None):
+    """Adds the client header to every request of the driver's current tab; returns the client id.
+
+    Without it the replay server tells clients apart by address only, which multiplexed lanes and
+    sessions on the same node share.
+    """
+    client_id = client_id or uuid.uuid4().hex
+    execute_cdp(driver, "Network.enable")
+    execute_cdp(driver, "Network.setExtraHTTPHeaders", {"headers": {CLIENT_HEADER: client_id}})
+    return client_id
+
+
+class HarRecorder:
+    """Turns Chrome performance log events into HAR entries"""
+
+    def __init__(self):
+        self.requests = {}  # requestId -> partial entry
+        self.entries = []
+
+    def collect(self, driver):
+        """Drains the performance log and fetches bodies of finished requests"""
+        for record in driver.execute("getLog", {"type": "performance"})["value"]:
+            message = json.loads(record["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                redirect = params.get("redirectResponse")
+                if redirect and request_id in self.requests:
+                    # A redirect reuses the requestId; store the 3xx hop as its own entry
+                    self.entries.append(self._entry(self.requests[request_id], redirect, "", False))
+                request = params["request"]
+                self.requests[request_id] = {
+                    "startedDateTime": params.get("wallTime"),
+                    "request": {
+                        "method": request["method"],
+                        "url": request["url"] + request.get("urlFragment", ""),
+                        "headers": [{"name": k, "value": v} for k, v in request.get("headers", {}).items()],
+                        "postData": {"text": request["postData"]} if request.get("postData") else None,
+                    },
+                }
+            elif method == "Network.responseReceived" and request_id in self.requests:
+                self.requests[request_id]["response"] = params["response"]
+            elif method == "Network.loadingFinished" and request_id in self.requests:
+                pending = self.requests.pop(request_id)
+                if "response" not in pending:
+                    continue
+                try:
+                    body = execute_cdp(driver, "Network.getResponseBody", {"requestId": request_id})
+                except Exception:
+                    body = {"body": "", "base64Encoded": False}  # Evicted or served from another tab
+                self.entries.append(self._entry(pending, pending["response"], body["body"], body["base64Encoded"]))
+
+    @staticmethod
+    def _entry(pending, response, body, base64_encoded):
+        content = {"mimeType": response.get("mimeType", ""), "text": body}
+        if base64_encoded:
+            content["encoding"] = "base64"
+        return {
+            "startedDateTime": pending.get("startedDateTime"),
+            "request": {k: v for k, v in pending["request"].items() if v is not None},
+            "response": {
+                "status": response["status"],
+                "statusText": response.get("statusText", ""),
+                "headers": [{"name": k, "value": v} for k, v in response.get("headers", {}).items()],
+                "content": content,
+            },
+        }
+
+    def save(self, path):
+        har = {"log": {"version": "1.2", "creator": {"name": "tt4i", "version": "1"}, "entries": self.entries}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(har, f)
+
+
+class ReplayStore:
+    """Looks up recorded responses by method, host, path and query"""
+
+    def __init__(self, har_path):
+        with open(har_path, encoding="utf-8") as f:
+            entries = json.load(f)["log"]["entries"]
+        self._lock = threading.Lock()
+        self._by_path = {}  # (method, host, path) -> list of entries in recorded order
+        self._served = {}  # client -> {request key: times served since the client's last page load}
+        for entry in entries:
+            request = entry["request"]
+            url = urlsplit(request["url"])
+            key = (request["method"], url.hostname, url.path or "/")
+            self._by_path.setdefault(key, []).append(entry)
+
+    def lookup(self, method, host, target, body=None, client=None, document=False):
+        """Returns the best recorded entry for the request, or None.
+
+        client identifies the browser tab (its client header, else its address); document marks a page load,
+        which restarts the client's sequence so every session and every visit of a page replays from the start.
+        """
+        url = urlsplit(target)
+        candidates = self._by_path.get((method, host, url.path or "/"))
+        if not candidates:
+            return None
+        query = set(parse_qsl(url.query, keep_blank_values=True))
+
+        def score(entry):
+            request = entry["request"]
+            recorded = set(parse_qsl(urlsplit(request["url"]).query, keep_blank_values=True))
+            same_body = body is not None and request.get("postData", {}).get("text") == body
+            # Prefer identical query and body; cache-busting params make exact matches rare
+            return len(query & recorded) - len(query ^ recorded) + (5 if same_body else 0)
+
+        best = max(score(entry) for entry in candidates)
+        matches = [entry for entry in candidates if score(entry) == best]
+        # Repeated identical requests within one page load are answered in recorded order
+        key = (method, host, target, body)
+        with self._lock:
+            if document:
+                self._served.pop(client, None)
+            served = self._served.setdefault(client, {})
+            index = served.get(key, 0)
+            served[key] = index + 1
+        return matches[min(index, len(matches) - 1)]
+
+
+def _make_handler(store):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _replay(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8", "replace") if length else None
+            host = (self.headers.get("Host") or "").split(":")[0]
+            document = self.headers.get("Sec-Fetch-Dest") == "document"
+            client = self.headers.get(CLIENT_HEADER) or self.client_address[0]
+            entry = store.lookup(self.command, host, self.path, body, client=client, document=document)
+            if entry is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            response = entry["response"]
+            content = response["content"]
+            payload = content.get("text", "")
+            if content.get("encoding") == "base64":
+                payload = base64.b64decode(payload)
+            else:
+                payload = payload.encode("utf-8")
+            self.send_response(response["status"])
+            for header in response["headers"]:
+                if header["name"].lower() not in SKIPPED_HEADERS:
+                    for value in header["value"].split("\n"):
+                        self.send_header(header["name"], value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_HEAD = do_PUT = do_OPTIONS = _replay
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def start_replay_server(har_path, port, host="0.0.0.0", certfile=None, keyfile=None):
+    """Serves a recorded HAR from a daemon thread and returns the server"""
+    server = ThreadingHTTPServer((host, port), _make_handler(ReplayStore(har_path)))
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+    return server
+
+
+def record(out_path):
+    """Runs one scenario session with recording enabled and writes the HAR file"""
+    import final_test_script as suite
+    from scheduler import SessionResult
+
+    enable_recording(suite.options)
+    recorder = HarRecorder()
+    driver = suite.create_driver()
+    try:
+        suite.run_scenario(driver, SessionResult(1), after_step=lambda d: recorder.collect(d), sessions=1)
+        recorder.collect(driver)
+    finally:
+        driver.quit()
+    recorder.save(out_path)
+    suite.log_message(f"💾 Recorded {len(recorder.entries)} responses to {out_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or replay the sites used by the test scenario")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="Run one session against the live sites and save a HAR")
+    record_parser.add_argument("--out", default="recording.har")
+    serve_parser = commands.add_parser("serve", help="Serve a recorded HAR as a local stand-in site")
+    serve_parser.add_argument("har")
+    serve_parser.add_argument("--port", type=int, default=8443)
+    serve_parser.add_argument("--cert", help="TLS certificate (required for https sites)")
+    serve_parser.add_argument("--key", help="TLS private key")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.out)
+    else:
+        server = start_replay_server(args.har, args.port, certfile=args.cert, keyfile=args.key)
+        print(f"Replaying {args.har} on port {args.port}. Press Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
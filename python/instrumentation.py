@@ -0,0 +1,61 @@
+import time
+from selenium import webdriver
+
+# WebDriver command instrumentation
+# Every WebDriver command (including those issued through WebElement objects)
+# goes through WebDriver.execute, so listeners registered here see each round trip.
+
+_command_listeners = []
+_session_listeners = []
+
+
+def add_command_listener(listener):
+    """Registers listener(command, params, started, duration, error) for every WebDriver command"""
+    _command_listeners.append(listener)
+
+
+def add_session_listener(listener):
+    """Registers listener(event, driver, error) called with "start" and "quit" for every session"""
+    _session_listeners.append(listener)
+
+
+def _notify_session(event, driver, error=None):
+    for listener in _session_listeners:
+        try:
+            listener(event, driver, error)
+        except Exception:
+            pass
+
+
+class InstrumentedRemote(webdriver.Remote):
+    """Remote WebDriver that reports each command and session start/quit to the registered listeners"""
+
+    def start_session(self, capabilities):
+        super().start_session(capabilities)
+        _notify_session("start", self)
+
+    def quit(self):
+        error = None
+        try:
+            super().quit()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _notify_session("quit", self, error)
+
+    def execute(self, driver_command, params=None):
+        started = time.monotonic()
+        error = None
+        try:
+            return super().execute(driver_command, params)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration = time.monotonic() - started
+            for listener in _command_listeners:
+                try:
+                    listener(driver_command, params, started, duration, error)
+                except Exception:
+                    pass  # Telemetry must never break a test run
@@ -0,0 +1,209 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tabulate import tabulate
+from benchmark import percentile
+
+# Open-loop load generator
+# Starts scenario runs at a target arrival rate (constant, ramp or step
+# profile) regardless of how long each run takes, up to a concurrency cap.
+# Latency is measured from the intended start time, so time spent waiting for
+# a free worker is included and slow runs cannot hide load (no coordinated
+# omission). Prints a throughput/latency report at the end.
+#
+#   python load_generator.py --profile constant --rate 6 --duration 600 --max-concurrency 5
+#   python load_generator.py --profile ramp --rate 2 --ramp-to 20 --duration 900
+#   python load_generator.py --profile step --steps 5:300,10:300,20:300 --json load.json
+
+PERCENTILES = (50, 90, 99)
+
+
+def rate_at(profile, t, rate, ramp_to=None, duration=None, steps=None):
+    """Arrivals per minute at t seconds into the run"""
+    if profile == "constant":
+        return rate
+    if profile == "ramp":
+        return rate + (ramp_to - rate) * min(1.0, t / duration)
+    if profile == "step":
+        elapsed = 0.0
+        for step_rate, step_duration in steps:
+            elapsed += step_duration
+            if t < elapsed:
+                return step_rate
+        return 0.0
+    raise ValueError(f"Unknown profile {profile}")
+
+
+def schedule(profile, duration, rate, ramp_to=None, steps=None, poisson=False, seed=None):
+    """Intended start offsets (seconds) of every run"""
+    rng = random.Random(seed)
+    if profile == "step":
+        duration = sum(step_duration for _, step_duration in steps)
+    offsets = []
+    t = 0.0
+    while t < duration:
+        per_second = rate_at(profile, t, rate, ramp_to, duration, steps) / 60
+        if per_second <= 0:
+            t += 1.0  # Idle part of the profile
+            continue
+        offsets.append(t)
+        t += rng.expovariate(per_second) if poisson else 1 / per_second
+    return offsets
+
+
+class Sample:
+    """Timing of one run: intended start, actual start and finish, on the monotonic clock"""
+
+    def __init__(self, intended):
+        self.intended = intended
+        self.started = None
+        self.finished = None
+        self.ok = False
+        self.dropped = False
+
+    @property
+    def latency(self):
+        return self.finished - self.intended
+
+    @property
+    def queued(self):
+        return self.started - self.intended
+
+
+class LoadGenerator:
+    """Dispatches runs at their intended times into a capped worker pool"""
+
+    def __init__(self, run_once, max_concurrency, max_backlog=None, log=print):
+        self.run_once = run_once  # Runs one scenario and returns True when it passed
+        self.max_concurrency = max_concurrency
+        self.max_backlog = max_backlog  # Runs allowed to wait for a worker before new ones are dropped
+        self.log = log
+        self._lock = threading.Lock()
+        self._backlog = 0
+
+    def _run(self, sample):
+        with self._lock:
+            self._backlog -= 1
+        sample.started = time.monotonic()
+        try:
+            sample.ok = bool(self.run_once())
+        except Exception as e:
+            self.log(f"❌ Run failed: {type(e).__name__}: {e}")
+        sample.finished = time.monotonic()
+
+    def run(self, offsets):
+        """Starts one run per offset and returns the samples once all have finished"""
+        samples = []
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="load") as pool:
+            for offset in offsets:
+                sample = Sample(start + offset)
+                samples.append(sample)
+                delay = sample.intended - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                with self._lock:
+                    if self.max_backlog is not None and self._backlog >= self.max_backlog:
+                        sample.dropped = True
+                        continue
+                    self._backlog += 1
+                # A busy pool queues the run; its wait counts towards latency
+                pool.submit(self._run, sample)
+        return samples
+
+
+def report(samples, wall_time):
+    """Throughput, success rate and latency percentiles of a load run"""
+    completed = [s for s in samples if s.finished is not None]
+    passed = [s for s in completed if s.ok]
+    latencies = [s.latency for s in completed]
+    queued = [s.queued for s in completed]
+    service = [s.finished - s.started for s in completed]
+    first = min((s.intended for s in samples), default=0.0)
+    offered = (len(samples) - 1) / (samples[-1].intended - first) * 60 if len(samples) > 1 else 0.0
+    return {
+        "offered": len(samples),
+        "offered_per_minute": offered,
+        "completed": len(completed),
+        "passed": len(passed),
+        "dropped": sum(1 for s in samples if s.dropped),
+        "throughput_per_minute": len(completed) / wall_time * 60 if wall_time else 0.0,
+        "goodput_per_minute": len(passed) / wall_time * 60 if wall_time else 0.0,
+        "latency": {f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+        "queued": {f"p{p}": percentile(queued, p) for p in PERCENTILES},
+        "service": {f"p{p}": percentile(service, p) for p in PERCENTILES},
+        "max_latency": max(latencies) if latencies else 0.0,
+    }
+
+
+def format_report(result):
+    rows = [[name] + [f"{result[key][f'p{p}']:.1f}" for p in PERCENTILES]
+            for name, key in (("Latency (from intended start)", "latency"), ("Queued for a worker", "queued"),
+                              ("Scenario run", "service"))]
+    table = tabulate(rows, headers=["", "p50 s", "p90 s", "p99 s"], tablefmt="pretty")
+    return (f"{table}\n"
+            f"Offered: {result['offered']} runs ({result['offered_per_minute']:.1f}/min)  "
+            f"completed: {result['completed']}  passed: {result['passed']}  dropped: {result['dropped']}\n"
+            f"Throughput: {result['throughput_per_minute']:.1f}/min  goodput: {result['goodput_per_minute']:.1f}/min  "
+            f"max latency: {result['max_latency']:.1f}s")
+
+
+def parse_steps(text):
+    """Parses 'rate:seconds,rate:seconds' into [(rate, seconds), ...]"""
+    steps = []
+    for part in text.split(","):
+        rate, seconds = part.split(":")
+        steps.append((float(rate), float(seconds)))
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load generation at a target arrival rate")
+    parser.add_argument("--profile", choices=["constant", "ramp", "step"], default="constant")
+    parser.add_argument("--rate", type=float, default=6, help="Runs started per minute (start rate for ramp)")
+    parser.add_argument("--ramp-to", type=float, help="Rate per minute at the end of a ramp")
+    parser.add_argument("--steps", help="Step profile as rate:seconds pairs, e.g. 5:300,10:300")
+    parser.add_argument("--duration", type=float, default=600, help="Seconds of arrivals (constant and ramp)")
+    parser.add_argument("--poisson", action="store_true", help="Exponential instead of even inter-arrival times")
+    parser.add_argument("--max-concurrency", type=int, default=5, help="Runs in flight at most")
+    parser.add_argument("--max-backlog", type=int, help="Runs allowed to wait for a worker before new ones are dropped")
+    parser.add_argument("--pool", action="store_true", help="Reuse warm sessions between runs")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    if args.profile == "ramp" and args.ramp_to is None:
+        parser.error("--profile ramp requires --ramp-to")
+    if args.profile == "step" and not args.steps:
+        parser.error("--profile step requires --steps")
+
+    import final_test_script as suite
+    from scheduler import SessionScheduler
+    from session_pool import SessionPool
+
+    session_pool = SessionPool(suite.create_driver, args.max_concurrency, log=suite.log_message) if args.pool else None
+    scheduler = SessionScheduler(suite.create_driver, suite.run_scenario, concurrency=args.max_concurrency,
+                                 summary_every=0, log=suite.log_message, pool=session_pool)
+    offsets = schedule(args.profile, args.duration, args.rate, args.ramp_to,
+                       parse_steps(args.steps) if args.steps else None, args.poisson, args.seed)
+    generator = LoadGenerator(lambda: scheduler.run_session().ok, args.max_concurrency, args.max_backlog,
+                              log=suite.log_message)
+    started = time.monotonic()
+    try:
+        samples = generator.run(offsets)
+    finally:
+        if session_pool:
+            session_pool.close()
+    result = report(samples, time.monotonic() - started)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import time
+import threading
+from tabulate import tabulate
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+from extract import to_js_locator, read_elements, find_first
+
+# Locator registry
+# Every element the scenario touches is declared once per page, with a fast
+# CSS/ID primary and the proven XPath as fallback. All candidates of a locator
+# are tried in a single execute_script round trip, and each lookup's latency
+# and matching candidate are recorded, so slow or stale primaries show up as
+# fallback hits.
+
+_lookup_listeners = []
+
+
+def add_lookup_listener(listener):
+    """Registers listener(locator_name, candidate, duration) for every lookup; candidate is None on a miss"""
+    _lookup_listeners.append(listener)
+
+
+class Locator:
+    """A named element with a primary locator and fallbacks, precompiled for the extraction scripts"""
+
+    def __init__(self, primary, *fallbacks, text=None):
+        self.name = None  # Set by the Page it is declared on
+        self.candidates = (primary,) + fallbacks
+        self.text = text  # Label every candidate's element must contain, so structural selectors still check it
+        self.js = [to_js_locator(candidate) + ([text] if text else []) for candidate in self.candidates]
+
+    @property
+    def primary(self):
+        """The (By, value) pair for APIs that take a single Selenium locator"""
+        return self.candidates[0]
+
+    def __repr__(self):
+        return f"Locator({self.name})"
+
+
+class Page:
+    """The locators of one page, e.g. CAREERS.see_all_teams"""
+
+    def __init__(self, name, **locators):
+        self.name = name
+        for key, locator in locators.items():
+            locator.name = f"{name}.{key}"
+            setattr(self, key, locator)
+
+
+class LocatorStats:
+    """Lookup counts, latency and fallback hits per locator"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = {}
+
+    def record(self, name, candidate, duration):
+        with self._lock:
+            entry = self.entries.setdefault(name, {"lookups": 0, "total": 0.0, "max": 0.0, "fallback": 0, "miss": 0})
+            entry["lookups"] += 1
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], duration)
+            if candidate is None:
+                entry["miss"] += 1
+            elif candidate > 0:
+                entry["fallback"] += 1
+
+    def rows(self):
+        """[name, lookups, mean ms, max ms, fallback hits, misses], slowest first"""
+        with self._lock:
+            rows = [[name, e["lookups"], e["total"] / e["lookups"] * 1000, e["max"] * 1000, e["fallback"], e["miss"]]
+                    for name, e in self.entries.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+STATS = LocatorStats()
+
+
+def format_stats(stats=STATS):
+    """Table of the per-locator lookup stats, slowest locators first"""
+    rows = [[name, lookups, f"{mean:.0f}", f"{slowest:.0f}", fallback, miss]
+            for name, lookups, mean, slowest, fallback, miss in stats.rows()]
+    return tabulate(rows, headers=["Locator", "Lookups", "Mean ms", "Max ms", "Fallback hits", "Misses"],
+                    tablefmt="pretty")
+
+
+def _record(locator, candidate, duration):
+    STATS.record(locator.name, candidate, duration)
+    for listener in _lookup_listeners:
+        try:
+            listener(locator.name, candidate, duration)
+        except Exception:
+            pass  # Telemetry must never break a test run
+
+
+def _find(driver, locator, root=None):
+    start = time.monotonic()
+    found = find_first(driver, locator.js, root)
+    _record(locator, found["candidate"] if found else None, time.monotonic() - start)
+    return found
+
+
+def resolve(driver, locator, root=None):
+    """Returns the element of the first matching candidate, searching under root when given"""
+    found = _find(driver, locator, root)
+    if not found:
+        label = f" with text {locator.text!r}" if locator.text else ""
+        raise NoSuchElementException(f"{locator.name} not found by any of {locator.candidates}{label}")
+    return found["element"]
+
+
+def present(locator):
+    """Wait condition: the element exists"""
+    def condition(driver):
+        found = _find(driver, locator)
+        return found["element"] if found else False
+    condition.__name__ = f"present({locator.name})"
+    return condition
+
+
+def clickable(locator):
+    """Wait condition: the element is visible and enabled, checked in the same round trip as the lookup"""
+    def condition(driver):
+        found = _find(driver, locator)
+        return found["element"] if found and found["visible"] and found["enabled"] else False
+    condition.__name__ = f"clickable({locator.name})"
+    return condition
+
+
+def resolve_all(driver, locators):
+    """Reads several independent locators of a page in one round trip (see extract.read_elements)"""
+    start = time.monotonic()
+    elements = read_elements(driver, locators)
+    duration = time.monotonic() - start
+    for name, locator in locators.items():
+        candidate = elements[name]["candidate"]
+        if isinstance(locator, Locator):
+            _record(locator, candidate if candidate >= 0 else None, duration)
+    return elements
+
+
+# Pages of the scenario. CSS primaries come first; the XPath fallbacks are the original text-based locators.
+# Where the original locator matched a label, `text` keeps checking it for every candidate.
+HOME = Page(
+    "home",
+    company_menu=Locator((By.CSS_SELECTOR, "#navbarDropdownMenuLink"),
+                         (By.XPATH, "//a[@href='#'][contains(text(), 'Company')]"), text="Company"),
+    careers_link=Locator((By.CSS_SELECTOR, "a.dropdown-sub[href$='/careers/']"),
+                         (By.XPATH, "//a[contains(text(), 'Careers')]"), text="Careers"),
+    cookie_accept=Locator((By.ID, "wt-cli-accept-all-btn")),
+)
+
+CAREERS = Page(
+    "careers",
+    see_all_teams=Locator((By.CSS_SELECTOR, "a.loadmore"),
+                          (By.XPATH, "//a[contains(text(), 'See all teams')]"), text="See all teams"),
+    our_locations=Locator((By.CSS_SELECTOR, "#career-our-location h3"),
+                          (By.XPATH, "//h3[contains(text(), 'Our Locations')]"), text="Our Locations"),
+    life_at_insider=Locator((By.CSS_SELECTOR, "#career-life-at-insider h2"),
+                            (By.XPATH, "//h2[contains(text(), 'Life at Insider')]"), text="Life at Insider"),
+)
+
+QA_CAREERS = Page(
+    "qa_careers",
+    see_all_qa_jobs=Locator((By.CSS_SELECTOR, "a[href*='open-positions/?department=qualityassurance']"),
+                            (By.XPATH, "//a[contains(text(), 'See all QA jobs')]"), text="See all QA jobs"),
+)
+
+OPEN_POSITIONS = Page(
+    "open_positions",
+    department_filter=Locator((By.ID, "select2-filter-by-department-container")),
+    location_filter=Locator((By.ID, "select2-filter-by-location-container")),
+    location_dropdown=Locator((By.CSS_SELECTOR, "span[aria-labelledby='select2-filter-by-location-container']"),
+                              (By.XPATH, "//span[@aria-labelledby='select2-filter-by-location-container']")),
+    istanbul_option=Locator((By.CSS_SELECTOR, "li.select2-results__option[id$='-Istanbul, Turkiye']"),
+                            (By.XPATH, "//li[contains(text(), 'Istanbul, Turkiye')]"), text="Istanbul, Turkiye"),
+    result_counter=Locator((By.ID, "resultCounter")),
+    job_row=Locator((By.CLASS_NAME, "position-list-item")),
+    view_role=Locator((By.CSS_SELECTOR, "a.btn[href*='jobs.lever.co']"),
+                      (By.XPATH, ".//a[contains(text(), 'View Role')]"), text="View Role"),
+)
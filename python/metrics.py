@@ -0,0 +1,255 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus metrics
+# A small thread-safe registry rendered in the Prometheus text exposition format
+# and served on the test-controller's port 8080 (GET /metrics).
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+COMMAND_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            if key not in self._children:
+                self._children[key] = self._new_child()
+            return self._children[key]
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {self.value}"]
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def render(self, name, labelnames, key):
+        with self._lock:
+            lines = [
+                f"{name}_bucket{_format_labels(labelnames, key, [('le', bound)])} {count}"
+                for bound, count in zip(self.buckets, self.counts)
+            ]
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, [('le', '+Inf')])} {self.count}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {self.sum}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {self.count}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class Registry:
+    """Holds every metric exported by the controller"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+STEP_DURATION = REGISTRY.register(Histogram(
+    "tt4i_step_duration_seconds", "Duration of each scenario step", ["step"]))
+STEP_RETRIES = REGISTRY.register(Counter(
+    "tt4i_step_retries_total", "Retries performed inside each scenario step", ["step"]))
+STEP_RESULTS = REGISTRY.register(Counter(
+    "tt4i_step_results_total", "Scenario step outcomes", ["step", "result"]))
+SESSION_RESULTS = REGISTRY.register(Counter(
+    "tt4i_sessions_total", "Scenario session outcomes", ["result"]))
+SESSION_DURATION = REGISTRY.register(Histogram(
+    "tt4i_session_duration_seconds", "End-to-end duration of a scenario session"))
+SESSION_CREATE_DURATION = REGISTRY.register(Histogram(
+    "tt4i_session_create_duration_seconds", "Latency of creating a WebDriver session on the grid", ["result"]))
+PREFLIGHT_RESULTS = REGISTRY.register(Counter(
+    "tt4i_preflight_probes_total", "HTTP pre-flight probe outcomes per upstream site", ["target", "result"]))
+PREFLIGHT_DURATION = REGISTRY.register(Histogram(
+    "tt4i_preflight_probe_duration_seconds", "Latency of HTTP pre-flight probes", ["target"],
+    buckets=COMMAND_BUCKETS))
+ORPHANS_REAPED = REGISTRY.register(Counter(
+    "tt4i_orphan_sessions_reaped_total", "Grid sessions deleted because no controller session owned them"))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "tt4i_session_queue_depth", "Session requests waiting for a free grid slot"))
+QUEUE_DEMAND = REGISTRY.register(Gauge(
+    "tt4i_session_demand", "Sessions running plus waiting; the HPA scales selenium-chrome on this"))
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "tt4i_session_queue_wait_seconds", "Time session requests spent waiting for a grid slot"))
+QUEUE_REJECTED = REGISTRY.register(Counter(
+    "tt4i_session_queue_rejected_total", "Session requests rejected by the queue", ["reason"]))
+SLOT_UTILIZATION = REGISTRY.register(Gauge(
+    "tt4i_grid_slot_utilization", "Share of the grid's slots used by running sessions"))
+LOCATOR_LOOKUPS = REGISTRY.register(Counter(
+    "tt4i_locator_lookups_total", "Element lookups per registry locator and the candidate that matched",
+    ["locator", "result"]))
+LOCATOR_DURATION = REGISTRY.register(Histogram(
+    "tt4i_locator_lookup_duration_seconds", "Latency of element lookups per registry locator", ["locator"],
+    buckets=COMMAND_BUCKETS))
+WEBDRIVER_COMMANDS = REGISTRY.register(Counter(
+    "tt4i_webdriver_commands_total", "WebDriver commands sent to the grid", ["command", "result"]))
+WEBDRIVER_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "tt4i_webdriver_command_duration_seconds", "Round-trip latency of WebDriver commands", ["command"],
+    buckets=COMMAND_BUCKETS))
+
+
+def record_command(command, params, started, duration, error):
+    """Command listener that counts WebDriver commands and their latency"""
+    WEBDRIVER_COMMANDS.labels(command=command, result="error" if error else "ok").inc()
+    WEBDRIVER_COMMAND_DURATION.labels(command=command).observe(duration)
+
+
+def record_lookup(locator, candidate, duration):
+    """Lookup listener that counts primary hits, fallback hits and misses per locator"""
+    result = "miss" if candidate is None else "primary" if candidate == 0 else "fallback"
+    LOCATOR_LOOKUPS.labels(locator=locator, result=result).inc()
+    LOCATOR_DURATION.labels(locator=locator).observe(duration)
+
+
+def record_probes(results):
+    """Records the outcome and latency of each pre-flight probe"""
+    for probe in results:
+        PREFLIGHT_RESULTS.labels(target=probe.target.name, result="ok" if probe.ok else "failed").inc()
+        PREFLIGHT_DURATION.labels(target=probe.target.name).observe(probe.latency)
+
+
+def record_queue(depth, in_use, capacity):
+    """Queue listener that exports depth, demand and slot utilization"""
+    QUEUE_DEPTH.labels().set(depth)
+    QUEUE_DEMAND.labels().set(depth + in_use)
+    if capacity:
+        SLOT_UTILIZATION.labels().set(in_use / capacity)
+
+
+def record_session(result):
+    """Records the outcome of a finished scenario session"""
+    if result.skipped:
+        SESSION_RESULTS.labels(result="skipped").inc()
+        return
+    if result.queue_wait is not None:
+        QUEUE_WAIT.labels().observe(result.queue_wait)
+    if result.rejected:
+        QUEUE_REJECTED.labels(reason=result.rejected).inc()
+        SESSION_RESULTS.labels(result="rejected").inc()
+        return
+    if result.upstream_failure:
+        SESSION_RESULTS.labels(result="upstream_failure").inc()
+        return
+    SESSION_RESULTS.labels(result="passed" if result.ok else "failed").inc()
+    SESSION_DURATION.labels().observe(result.duration)
+    for name, step in result.steps.items():
+        STEP_DURATION.labels(step=name).observe(step["duration"])
+        STEP_RESULTS.labels(step=name, result="passed" if step["ok"] else "failed").inc()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the test logs
+
+
+def start_metrics_server(port=8080, host="0.0.0.0"):
+    """Serves /metrics from a daemon thread and returns the server"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,162 @@
+import copy
+import threading
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.mobile import Mobile
+from selenium.webdriver.remote.switch_to import SwitchTo
+import tracing
+from cdp import execute_cdp
+from instrumentation import InstrumentedRemote
+
+# Session multiplexing
+# Runs several scenario lanes inside one WebDriver session. Each lane gets its
+# own window, in a separate CDP browser context when Chrome allows it (own
+# cookies and storage), and a lane driver that switches to the lane's window
+# before every command.
+#
+# Each command holds the session lock from start to finish, including get() and
+# the page load it waits for: chromedriver runs one command per session at a
+# time, so releasing the lock would not let lanes overlap either. Lanes only
+# interleave between commands (wait polling, scenario code), which is why
+# navigation uses the eager page-load strategy in this mode. The time lanes
+# spend waiting for each other is traced as "lane_lock" spans and reported by
+# `benchmark.py --lanes N`.
+
+# Commands that change or report the focused window and are handled per lane
+_WINDOW_COMMANDS = (Command.SWITCH_TO_WINDOW, Command.NEW_WINDOW)
+
+
+class IsolationError(Exception):
+    """Another lane would have to share the default browser context with an existing one"""
+
+
+class Lane:
+    """One scenario instance inside a multiplexed session"""
+
+    def __init__(self, session, number, handle, context=None):
+        self.session = session
+        self.number = number
+        self.home = handle
+        self.handle = handle  # Window the lane is currently working in
+        self.context = context  # CDP browser context id, None when the lane shares the default context
+        self.driver = self._make_driver()
+
+    def _make_driver(self):
+        driver = copy.copy(self.session.driver)
+        driver.__class__ = LaneDriver
+        # These helpers hold a reference to the driver they were created for
+        driver._switch_to = SwitchTo(driver)
+        driver._mobile = Mobile(driver)
+        driver._tt4i_lane = self
+        driver._tt4i_blocked_urls = None  # Request blocking is per window
+        return driver
+
+
+class LaneDriver(InstrumentedRemote):
+    """Driver view of one lane; created by MultiplexedSession.open_lane, never directly"""
+
+    def execute(self, driver_command, params=None):
+        lane = self._tt4i_lane
+        session = lane.session
+        with tracing.span("lane_lock", "lock"):
+            session.lock.acquire()
+        try:
+            if session.current != lane.handle and driver_command not in _WINDOW_COMMANDS:
+                super().execute(Command.SWITCH_TO_WINDOW, {"handle": lane.handle})
+                session.current = lane.handle
+            response = super().execute(driver_command, params)
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                lane.handle = session.current = params["handle"]
+                session.owners.setdefault(lane.handle, lane)
+            elif driver_command == Command.NEW_WINDOW:
+                session.owners[response["value"]["handle"]] = lane
+            elif driver_command == Command.CLOSE:
+                session.owners.pop(lane.handle, None)
+                lane.handle, session.current = lane.home, None
+            elif driver_command == Command.W3C_GET_WINDOW_HANDLES:
+                response["value"] = session.handles_of(lane, response["value"])
+            return response
+        finally:
+            session.lock.release()
+
+
+class MultiplexedSession:
+    """Opens lanes in one session and cleans up their windows and browser contexts"""
+
+    def __init__(self, driver, isolate=True, log=print):
+        self.driver = driver
+        self.isolate = isolate
+        self.log = log
+        self.lock = threading.Lock()  # One command at a time per session
+        self.original = driver.current_window_handle
+        self.current = self.original
+        self.owners = {}  # window handle -> Lane
+        self.lanes = []
+
+    def _open_context_window(self):
+        context = execute_cdp(self.driver, "Target.createBrowserContext", {"disposeOnDetach": True})["browserContextId"]
+        try:
+            handle = execute_cdp(self.driver, "Target.createTarget",
+                                 {"url": "about:blank", "browserContextId": context, "newWindow": True})["targetId"]
+            # chromedriver names windows by their target id; anything else cannot be driven
+            if handle not in self.driver.window_handles:
+                raise RuntimeError("chromedriver does not expose windows of other browser contexts")
+        except Exception:
+            execute_cdp(self.driver, "Target.disposeBrowserContext", {"browserContextId": context})
+            raise
+        return handle, context
+
+    def open_lane(self):
+        """Opens a window for a new lane and returns its driver"""
+        context = None
+        if self.isolate:
+            try:
+                handle, context = self._open_context_window()
+            except Exception as e:
+                # Only one lane may fall back to the default context, or lanes would share cookies and storage
+                if any(lane.context is None for lane in self.lanes):
+                    raise IsolationError(f"no browser context for lane {len(self.lanes) + 1}: {e}") from e
+                self.log(f"⚠️ Could not open an isolated browser context, lane {len(self.lanes) + 1} "
+                         f"uses the default one: {e}")
+        if context is None:
+            self.driver.switch_to.new_window("window")
+            handle = self.current = self.driver.current_window_handle
+        lane = Lane(self, len(self.lanes) + 1, handle, context)
+        self.owners[handle] = lane
+        self.lanes.append(lane)
+        return lane.driver
+
+    def handles_of(self, lane, handles):
+        """Filters the session's windows down to the lane's own, assigning new ones by browser context or opener"""
+        unknown = [handle for handle in handles if handle not in self.owners]
+        if unknown:
+            targets = {target["targetId"]: target
+                       for target in execute_cdp(self.driver, "Target.getTargets")["targetInfos"]}
+            for handle in unknown:
+                target = targets.get(handle, {})
+                owner = self.owners.get(target.get("openerId"))
+                if owner is None and target.get("browserContextId"):
+                    owner = next((other for other in self.lanes if other.context == target["browserContextId"]), None)
+                if owner is not None:
+                    self.owners[handle] = owner
+        return [handle for handle in handles if self.owners.get(handle) is lane]
+
+    def close(self):
+        """Closes every lane window and browser context and returns to the original window"""
+        for handle, lane in list(self.owners.items()):
+            if handle == self.original:
+                continue
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass  # Already closed by the scenario
+        for lane in self.lanes:
+            if lane.context:
+                try:
+                    self.driver.switch_to.window(self.original)
+                    execute_cdp(self.driver, "Target.disposeBrowserContext", {"browserContextId": lane.context})
+                except Exception as e:
+                    self.log(f"⚠️ Could not dispose browser context of lane {lane.number}: {e}")
+        self.owners.clear()
+        self.driver.switch_to.window(self.original)
+        self.current = self.original
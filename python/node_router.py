@@ -0,0 +1,202 @@
+import os
+import ssl
+import json
+import time
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Least-loaded node routing
+# The selenium-chrome Service picks a random pod for every new session, so a
+# session can land on a busy node (SE_NODE_MAX_SESSIONS=1) and fail. The router
+# discovers the chrome-node pods (Kubernetes Endpoints or a configured list),
+# polls each pod's /wd/hub/status for free slots and sends every new session
+# straight to a pod with a free slot. Pods that keep failing are skipped for a
+# cool-down period.
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+KUBERNETES_API = "https://kubernetes.default.svc"
+
+
+def _get_json(url, timeout, headers=None, context=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=timeout, context=context) as response:
+        return json.loads(response.read())
+
+
+def static_endpoints(urls):
+    """Discovery from a fixed list of node URLs"""
+    urls = [url.strip().rstrip("/") for url in urls if url.strip()]
+    return lambda: urls
+
+
+class KubernetesEndpoints:
+    """Discovers the ready pods behind a Service from its Endpoints object, using the pod's service account"""
+
+    def __init__(self, service, namespace=None, port=4444, path="/wd/hub", timeout=5):
+        self.service = service
+        self.namespace = namespace or self._read("namespace") or "default"
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self._context = ssl.create_default_context(cafile=os.path.join(SERVICE_ACCOUNT_DIR, "ca.crt"))
+
+    @staticmethod
+    def _read(name):
+        try:
+            with open(os.path.join(SERVICE_ACCOUNT_DIR, name), encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def __call__(self):
+        url = f"{KUBERNETES_API}/api/v1/namespaces/{self.namespace}/endpoints/{self.service}"
+        # The token is re-read on every call because Kubernetes rotates it
+        headers = {"Authorization": f"Bearer {self._read('token')}"}
+        endpoints = _get_json(url, self.timeout, headers, self._context)
+        urls = []
+        for subset in endpoints.get("subsets") or []:
+            ports = [p["port"] for p in subset.get("ports", [])]
+            port = self.port if self.port in ports or not ports else ports[0]
+            for address in subset.get("addresses") or []:  # notReadyAddresses are left out
+                urls.append(f"http://{address['ip']}:{port}{self.path}")
+        return urls
+
+
+class NodeState:
+    """Last known capacity and health of one chrome-node pod"""
+
+    def __init__(self, url):
+        self.url = url
+        self.free_slots = 0
+        self.max_slots = 0
+        self.reserved = 0  # Sessions being created on this node right now
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    def healthy(self, now):
+        return now >= self.unhealthy_until
+
+
+def free_slots(status):
+    """Returns (free, total) slots of the UP nodes in a /status response"""
+    value = status.get("value", {})
+    free = total = 0
+    for node in value.get("nodes", []):
+        if node.get("availability", "UP") != "UP":
+            continue
+        for slot in node.get("slots", []):
+            total += 1
+            if not slot.get("session"):
+                free += 1
+    if not value.get("nodes") and value.get("ready"):
+        return 1, 1  # Older nodes only report readiness
+    return free, total
+
+
+class NodeRouter:
+    """Picks the least-loaded healthy node for every new session, from cached and periodically refreshed state"""
+
+    def __init__(self, discover, refresh_interval=2.0, discovery_interval=30.0, failure_threshold=3, cooldown=30.0,
+                 timeout=3.0, log=print):
+        self.discover = discover
+        self.refresh_interval = refresh_interval
+        self.discovery_interval = discovery_interval
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.log = log
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._nodes = {}
+        self._refreshed = 0.0
+        self._discovered = 0.0
+
+    def nodes(self):
+        """URLs of every known node, e.g. for the orphan reaper"""
+        with self._lock:
+            return list(self._nodes)
+
+    def _discover(self):
+        try:
+            urls = self.discover()
+        except Exception as e:
+            self.log(f"⚠️ Node discovery failed, keeping the last known nodes: {e}")
+            return
+        with self._lock:
+            self._nodes = {url: self._nodes.get(url) or NodeState(url) for url in urls}
+            self._discovered = time.monotonic()
+
+    def _poll(self, node):
+        try:
+            free, total = free_slots(_get_json(f"{node.url}/status", self.timeout))
+        except Exception as e:
+            return node, None, None, e
+        return node, free, total, None
+
+    def refresh(self):
+        """Re-discovers the nodes when due and polls every node's /status in parallel"""
+        if time.monotonic() - self._discovered >= self.discovery_interval or not self._nodes:
+            self._discover()
+        nodes = list(self._nodes.values())
+        if not nodes:
+            return
+        with ThreadPoolExecutor(max_workers=min(16, len(nodes))) as pool:
+            polled = list(pool.map(self._poll, nodes))
+        with self._lock:
+            for node, free, total, error in polled:
+                if error is not None:
+                    self._failed(node, f"status check failed: {error}")
+                else:
+                    node.free_slots, node.max_slots = free, total
+                    node.failures = 0  # Only consecutive failures count towards the cooldown
+            self._refreshed = time.monotonic()
+
+    def _failed(self, node, reason):
+        node.failures += 1
+        node.free_slots = 0
+        if node.failures >= self.failure_threshold and node.healthy(time.monotonic()):
+            node.unhealthy_until = time.monotonic() + self.cooldown
+            self.log(f"⚠️ Node {node.url} marked unhealthy for {self.cooldown:.0f}s after {node.failures} failures "
+                     f"({reason}).")
+
+    def _refresh_if_due(self):
+        with self._refresh_lock:
+            # Concurrent sessions share one refresh instead of polling every node each
+            if time.monotonic() - self._refreshed >= self.refresh_interval:
+                self.refresh()
+
+    def capacity(self):
+        """Total slots of the healthy nodes, or None while no node is known"""
+        self._refresh_if_due()
+        now = time.monotonic()
+        with self._lock:
+            if not self._nodes:
+                return None
+            return sum(node.max_slots for node in self._nodes.values() if node.healthy(now))
+
+    def acquire(self):
+        """Reserves a free slot on the least-loaded healthy node; returns its URL, or None when no slot is known"""
+        self._refresh_if_due()
+        now = time.monotonic()
+        with self._lock:
+            candidates = [node for node in self._nodes.values()
+                          if node.healthy(now) and node.free_slots - node.reserved > 0]
+            if not candidates:
+                return None
+            node = max(candidates, key=lambda n: (n.free_slots - n.reserved, -n.failures))
+            node.reserved += 1
+            return node.url
+
+    def release(self, url, ok, error=None):
+        """Reports whether creating a session on the node worked"""
+        with self._lock:
+            node = self._nodes.get(url)
+            if node is None:
+                return
+            node.reserved = max(0, node.reserved - 1)
+            if ok:
+                node.failures = 0
+                node.free_slots = max(0, node.free_slots - 1)  # Until the next poll shows the new session
+            else:
+                self._failed(node, f"session creation failed: {error}")
@@ -0,0 +1,161 @@
+import time
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urljoin
+
+# HTTP pre-flight probes
+# Cheap checks of every site the scenario visits, run before a browser session is
+# requested. When a site is down (connection error or 5xx) the run is recorded
+# as an upstream failure and no Chrome node is taken. Other problems, e.g. a 4xx
+# bot challenge, a missing marker or a slow response, are only reported: the
+# browser may still get through where the probe did not.
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) tt4i-preflight"
+MAX_REDIRECTS = 5
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+
+class ProbeTarget:
+    """A URL the scenario depends on and the markers its HTML must contain"""
+
+    def __init__(self, name, url, markers=(), max_latency=5.0):
+        self.name = name
+        self.url = url
+        self.markers = tuple(markers)
+        self.max_latency = max_latency
+
+
+class ProbeResult:
+    def __init__(self, target, ok, status=None, latency=0.0, reason="", down=False):
+        self.target = target
+        self.ok = ok
+        self.status = status
+        self.latency = latency
+        self.reason = reason
+        self.down = down  # The site could not be reached or answered with a 5xx, so a browser run cannot pass
+
+
+class ConnectionPool:
+    """Keeps idle keep-alive connections per (scheme, host, port) for reuse between probes"""
+
+    def __init__(self, timeout=10.0, max_idle=4):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def _get(self, key, fresh=False):
+        """Returns (connection, reused)"""
+        if not fresh:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop(), True
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _send(self, key, path, headers):
+        """Sends a GET and returns (connection, response), retrying once if a reused connection was stale"""
+        connection, reused = self._get(key)
+        while True:
+            try:
+                connection.request("GET", path, headers=headers)
+                return connection, connection.getresponse()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection before any response; not an upstream failure
+                connection, reused = self._get(key, fresh=True)
+
+    def _put(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def request(self, url, headers=None):
+        """GETs url, following redirects; returns (status, body, response headers)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            connection, response = self._send(key, path, dict({"Host": parts.netloc, "User-Agent": USER_AGENT,
+                                                               "Accept": "text/html,application/json"},
+                                                              **(headers or {})))
+            try:
+                body = response.read(MAX_BODY_BYTES)
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                raise
+            if response.will_close or not response.isclosed():
+                # A body cut off at MAX_BODY_BYTES leaves unread bytes that would corrupt the next response
+                connection.close()
+            else:
+                self._put(key, connection)
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return response.status, body.decode("utf-8", "replace"), response.headers
+        raise http.client.HTTPException(f"Too many redirects for {url}")
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class PreflightChecker:
+    """Probes all targets concurrently; concurrent callers share one result for cache_seconds"""
+
+    def __init__(self, targets, cache_seconds=5.0, pool=None, on_results=None):
+        self.targets = list(targets)
+        self.cache_seconds = cache_seconds
+        self.pool = pool or ConnectionPool()
+        self.on_results = on_results
+        self._lock = threading.Lock()
+        self._last = None
+        self._last_at = 0.0
+
+    def _probe(self, target):
+        start = time.monotonic()
+        try:
+            status, body, _ = self.pool.request(target.url)
+        except Exception as e:
+            return ProbeResult(target, False, latency=time.monotonic() - start, reason=f"{type(e).__name__}: {e}",
+                               down=True)
+        latency = time.monotonic() - start
+        if status >= 400:
+            return ProbeResult(target, False, status, latency, f"HTTP {status}", down=status >= 500)
+        missing = [marker for marker in target.markers if marker not in body]
+        if missing:
+            return ProbeResult(target, False, status, latency, f"missing markers {missing}")
+        if latency > target.max_latency:
+            return ProbeResult(target, False, status, latency, f"latency {latency:.1f}s over {target.max_latency}s")
+        return ProbeResult(target, True, status, latency)
+
+    def check(self):
+        """Returns the list of ProbeResults, reusing a recent one when available"""
+        with self._lock:
+            if self._last is not None and time.monotonic() - self._last_at < self.cache_seconds:
+                return self._last
+            # The probes block on http.client, so they run on one thread per target
+            with ThreadPoolExecutor(max_workers=len(self.targets) or 1, thread_name_prefix="preflight") as pool:
+                self._last = list(pool.map(self._probe, self.targets))
+            self._last_at = time.monotonic()
+            if self.on_results:
+                self.on_results(self._last)
+            return self._last
+
+    def failures(self):
+        """Returns (down, degraded): descriptions of the sites that are down and of the other failed probes"""
+        results = self.check()
+        return ([f"{r.target.name}: {r.reason}" for r in results if r.down],
+                [f"{r.target.name}: {r.reason}" for r in results if not r.ok and not r.down])
@@ -0,0 +1,167 @@
+import sys
+import math
+import random
+import argparse
+from collections import deque
+from tabulate import tabulate
+from benchmark import percentile
+from session_queue import desired_replicas
+
+# Queue-driven autoscaling simulator
+# Replays an arrival pattern of session requests against the session queue and
+# an HPA that scales selenium-chrome on tt4i_session_demand (running + waiting
+# sessions per replica), and prints the replica decisions over time. Use it to
+# tune the HPA target, stabilization window and queue limits before deploying.
+#
+#   python queue_simulator.py --pattern burst --rate 2 --peak 12 --duration 1800
+#   python queue_simulator.py --arrivals arrivals.txt --startup 45 --max-replicas 8
+
+
+def arrival_rate(pattern, t, duration, rate, peak):
+    """Requests per minute at time t for the built-in patterns"""
+    if pattern == "constant":
+        return rate
+    if pattern == "step":
+        return rate if t < duration / 2 else peak
+    if pattern == "burst":
+        return peak if duration / 3 <= t < duration / 3 + duration / 6 else rate
+    if pattern == "sine":
+        return rate + (peak - rate) * (1 - math.cos(2 * math.pi * t / duration)) / 2
+    raise ValueError(f"Unknown pattern {pattern}")
+
+
+def generate_arrivals(pattern, duration, rate, peak, seed=None):
+    """Poisson arrival times for a time-varying rate, by thinning a process at the peak rate"""
+    rng = random.Random(seed)
+    top = max(rate, peak) / 60
+    arrivals = []
+    t = 0.0
+    while top > 0:
+        t += rng.expovariate(top)
+        if t >= duration:
+            break
+        if rng.random() < arrival_rate(pattern, t, duration, rate, peak) / 60 / top:
+            arrivals.append(t)
+    return arrivals
+
+
+def load_arrivals(path):
+    """Arrival offsets in seconds, one per line"""
+    with open(path, encoding="utf-8") as f:
+        return sorted(float(line) for line in f if line.strip())
+
+
+def simulate(arrivals, session_seconds=60.0, slots_per_replica=1, min_replicas=1, max_replicas=5,
+             target=1.0, tolerance=0.1, sync_period=15, startup=30, stabilization=300, max_depth=50,
+             queue_timeout=120.0, seed=None):
+    """Runs the queue and HPA model second by second; returns (timeline rows, summary)"""
+    rng = random.Random(seed)
+    pending = deque(arrivals)
+    waiting = deque()
+    running = []
+    replicas = min_replicas
+    starting = []  # Times at which pods that are scaling up become ready
+    recommendations = deque()
+    waits = []
+    rejected = timed_out = 0
+    replica_seconds = 0
+    timeline = []
+    end = (arrivals[-1] if arrivals else 0) + queue_timeout + session_seconds * 2
+    t = 0
+    while t <= end or waiting or running:
+        while pending and pending[0] <= t:
+            arrived = pending.popleft()
+            if len(waiting) >= max_depth:
+                rejected += 1
+            else:
+                waiting.append(arrived)
+        while waiting and t - waiting[0] > queue_timeout:
+            waiting.popleft()
+            timed_out += 1
+        running = [finish for finish in running if finish > t]
+        replicas += sum(1 for ready in starting if ready <= t)
+        starting = [ready for ready in starting if ready > t]
+        while waiting and len(running) < replicas * slots_per_replica:
+            waits.append(t - waiting.popleft())
+            running.append(t + session_seconds * rng.uniform(0.8, 1.2))
+
+        if t % sync_period == 0:
+            current = replicas + len(starting)
+            demand = len(waiting) + len(running)
+            recommendation = desired_replicas(current, demand, target * slots_per_replica, tolerance,
+                                              min_replicas, max_replicas)
+            recommendations.append((t, recommendation))
+            while recommendations[0][0] < t - stabilization:
+                recommendations.popleft()
+            if recommendation > current:
+                # Default HPA scale-up policy: at most max(4 pods, 100%) per period
+                desired = min(recommendation, current + max(4, current))
+            else:
+                # Scale down only to the highest recommendation within the stabilization window
+                desired = max(r for _, r in recommendations)
+            if desired > current:
+                starting += [t + startup] * (desired - current)
+            elif desired < current:
+                removed = current - desired
+                cancelled = min(removed, len(starting))
+                starting = starting[cancelled:]
+                replicas -= removed - cancelled
+            timeline.append([t, len(waiting), len(running), replicas, len(starting), demand, desired])
+        replica_seconds += replicas + len(starting)
+        t += 1
+
+    summary = {
+        "requests": len(arrivals),
+        "served": len(waits),
+        "rejected": rejected,
+        "timed_out": timed_out,
+        "wait_p50": percentile(waits, 50),
+        "wait_p95": percentile(waits, 95),
+        "wait_max": max(waits) if waits else 0.0,
+        "max_replicas": max(row[3] for row in timeline) if timeline else replicas,
+        "replica_minutes": replica_seconds / 60,
+    }
+    return timeline, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate queue-depth autoscaling of selenium-chrome")
+    parser.add_argument("--pattern", choices=["constant", "step", "burst", "sine"], default="burst")
+    parser.add_argument("--arrivals", help="File with arrival offsets in seconds, one per line")
+    parser.add_argument("--rate", type=float, default=2, help="Base session requests per minute")
+    parser.add_argument("--peak", type=float, default=10, help="Peak session requests per minute")
+    parser.add_argument("--duration", type=int, default=1800, help="Seconds of arrivals to generate")
+    parser.add_argument("--session-seconds", type=float, default=60)
+    parser.add_argument("--slots-per-replica", type=int, default=1, help="SE_NODE_MAX_SESSIONS")
+    parser.add_argument("--min-replicas", type=int, default=1)
+    parser.add_argument("--max-replicas", type=int, default=5)
+    parser.add_argument("--target", type=float, default=1.0, help="HPA averageValue of tt4i_session_demand per slot")
+    parser.add_argument("--sync-period", type=int, default=15)
+    parser.add_argument("--startup", type=int, default=30, help="Seconds until a new chrome pod is ready")
+    parser.add_argument("--stabilization", type=int, default=300, help="Scale-down stabilization window")
+    parser.add_argument("--max-depth", type=int, default=50)
+    parser.add_argument("--queue-timeout", type=float, default=120)
+    parser.add_argument("--every", type=int, default=60, help="Print one timeline row per this many seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    arrivals = (load_arrivals(args.arrivals) if args.arrivals
+                else generate_arrivals(args.pattern, args.duration, args.rate, args.peak, args.seed))
+    timeline, summary = simulate(
+        arrivals, args.session_seconds, args.slots_per_replica, args.min_replicas, args.max_replicas, args.target,
+        sync_period=args.sync_period, startup=args.startup, stabilization=args.stabilization,
+        max_depth=args.max_depth, queue_timeout=args.queue_timeout, seed=args.seed)
+
+    rows = [row for row in timeline if row[0] % args.every == 0]
+    print(tabulate(rows, headers=["t (s)", "Waiting", "Running", "Ready", "Starting", "Demand", "Desired"],
+                   tablefmt="pretty"))
+    print(f"Requests: {summary['requests']}  served: {summary['served']}  rejected: {summary['rejected']}  "
+          f"timed out: {summary['timed_out']}")
+    print(f"Queue wait p50: {summary['wait_p50']:.1f}s  p95: {summary['wait_p95']:.1f}s  "
+          f"max: {summary['wait_max']:.1f}s")
+    print(f"Peak replicas: {summary['max_replicas']}  replica-minutes: {summary['replica_minutes']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
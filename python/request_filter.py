@@ -0,0 +1,83 @@
+from cdp import execute_cdp
+
+# Request blocking
+# None of the checks need images, fonts, media or third-party analytics, so they
+# are blocked through CDP Network.setBlockedURLs. Rules are set per scenario step:
+# "block" patterns are added to the default deny list and "allow" patterns remove
+# matching entries from it for that step only.
+
+DEFAULT_BLOCKED_URLS = [
+    # Images and media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Third-party analytics, tags and embeds
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*",
+    "*linkedin.com/px*", "*snap.licdn.com*", "*ads-twitter.com*", "*bing.com/bat*",
+    "*youtube.com*", "*ytimg.com*", "*vimeo.com*", "*hubspot.com*", "*hs-scripts.com*",
+]
+
+# Chat, session-replay and social widgets the useinsider.com pages load after the content
+WIDGET_URLS = [
+    "*intercom.io*", "*intercomcdn.com*", "*drift.com*", "*driftt.com*", "*fullstory.com*",
+    "*mouseflow.com*", "*crazyegg.com*", "*instagram.com*", "*cdninstagram.com*", "*tiktok.com*",
+    "*lottiefiles.com*",
+]
+
+# Per-step overrides, keyed by step function name
+STEP_RULES = {
+    "visit_home_page": {"block": WIDGET_URLS, "allow": []},
+    "navigate_to_careers_page": {"block": WIDGET_URLS, "allow": []},
+    "verify_required_elements": {"block": WIDGET_URLS, "allow": []},
+    "navigate_to_qa_jobs": {"block": WIDGET_URLS, "allow": []},
+    "filter_jobs": {"block": WIDGET_URLS, "allow": []},
+    "verify_jobs": {"block": WIDGET_URLS, "allow": []},
+    # The Lever job page is only checked by URL, so its stylesheets can be skipped too. It opens in a new
+    # tab, and setBlockedURLs only reaches the current tab: the rule is installed after switching to it, so
+    # the document and whatever it requested before the switch are not blocked. Images are still skipped
+    # there because the lean profile disables them browser-wide.
+    "click_view_role_button": {"block": WIDGET_URLS + ["*.css"], "allow": []},
+}
+
+
+def blocked_urls_for(step_name, rules=None, default=None):
+    """Returns the deny list for a step after applying its allow/deny overrides"""
+    rule = (STEP_RULES if rules is None else rules).get(step_name, {})
+    allow = set(rule.get("allow", []))
+    blocked = [pattern for pattern in (DEFAULT_BLOCKED_URLS if default is None else default) if pattern not in allow]
+    return blocked + [pattern for pattern in rule.get("block", []) if pattern not in blocked]
+
+
+def apply_step_rules(driver, step_name):
+    """Installs the step's deny list in the current tab, skipping the call when it is unchanged.
+
+    The cache is per driver, not per tab: reset driver._tt4i_blocked_urls after switching tabs.
+    """
+    blocked = blocked_urls_for(step_name)
+    if getattr(driver, "_tt4i_blocked_urls", None) == blocked:
+        return
+    execute_cdp(driver, "Network.enable")
+    execute_cdp(driver, "Network.setBlockedURLs", {"urls": blocked})
+    driver._tt4i_blocked_urls = blocked
+
+
+def apply_lean_profile(options):
+    """Adds Chrome switches and prefs that skip work the checks never look at"""
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--mute-audio")
+    options.add_argument("--autoplay-policy=user-gesture-required")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-component-update")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--disable-sync")
+    options.add_argument("--metrics-recording-only")
+    options.add_argument("--no-first-run")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.geolocation": 2,
+    })
+    return options
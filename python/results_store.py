@@ -0,0 +1,214 @@
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from tabulate import tabulate
+
+# Run history store
+# Keeps every session result, its step timings and the job listings it found in
+# an embedded SQLite database, so trends survive pod restarts. Job listings are
+# stored once with first/last-seen runs and diffed against the previous run, so
+# only added and removed positions are reported.
+#
+#   python results_store.py /tmp/tt4i-results.db trends --step filter_jobs --since 7d
+#   python results_store.py /tmp/tt4i-results.db failures --since 24h --bucket 1h
+#   python results_store.py /tmp/tt4i-results.db jobs
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_outcome_started ON runs (outcome, started);
+
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    step TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_step_started ON steps (step, started);
+CREATE INDEX IF NOT EXISTS steps_started ON steps (started);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run_id);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    department TEXT NOT NULL,
+    location TEXT NOT NULL,
+    url TEXT NOT NULL,
+    first_seen_run INTEGER NOT NULL,
+    last_seen_run INTEGER NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (title, department, location, url)
+);
+CREATE INDEX IF NOT EXISTS jobs_active ON jobs (active);
+"""
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """Parses '90', '15m', '24h' or '7d' into seconds"""
+    text = text.strip()
+    if text[-1] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+def outcome(result):
+    if result.skipped:
+        return "skipped"
+    if result.rejected:
+        return "rejected"
+    if result.upstream_failure:
+        return "upstream_failure"
+    return "passed" if result.ok else "failed"
+
+
+def _job_key(job):
+    return (job.get("title") or "", job.get("department") or "", job.get("location") or "",
+            job.get("view_role_url") or "")
+
+
+class ResultsStore:
+    """SQLite-backed history of session results and job listings, safe to share between session threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        # WAL lets report queries read while the controller keeps writing
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+
+    def record(self, result):
+        """Stores a finished session and returns the job diff {"added": [...], "removed": [...]}"""
+        with self._lock, self._db:
+            run_id = self._db.execute(
+                "INSERT INTO runs (started, duration, ok, outcome, error) VALUES (?, ?, ?, ?, ?)",
+                (result.started, result.duration, int(result.ok), outcome(result), result.error or result.skipped),
+            ).lastrowid
+            rows = [(run_id, name, step["started"], step["duration"], int(step["ok"]))
+                    for name, step in result.steps.items()]
+            self._db.executemany("INSERT INTO steps (run_id, step, started, duration, ok) VALUES (?, ?, ?, ?, ?)",
+                                 rows)
+            if result.jobs is None:
+                return {"added": [], "removed": []}
+            return self._diff_jobs(run_id, result.jobs)
+
+    def _diff_jobs(self, run_id, jobs):
+        active = {tuple(row[1:]): row[0] for row in self._db.execute(
+            "SELECT id, title, department, location, url FROM jobs WHERE active = 1")}
+        current = {_job_key(job) for job in jobs}
+        added = sorted(current - set(active))
+        removed = sorted(set(active) - current)
+        for key in added:
+            self._db.execute(
+                "INSERT INTO jobs (title, department, location, url, first_seen_run, last_seen_run, active) "
+                "VALUES (?, ?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (title, department, location, url) DO UPDATE SET active = 1, last_seen_run = ?",
+                key + (run_id, run_id, run_id))
+        self._db.executemany("UPDATE jobs SET active = 0 WHERE id = ?", [(active[key],) for key in removed])
+        self._db.executemany("UPDATE jobs SET last_seen_run = ? WHERE id = ?",
+                             [(run_id, active[key]) for key in current & set(active)])
+        columns = ("title", "department", "location", "url")
+        return {"added": [dict(zip(columns, key)) for key in added],
+                "removed": [dict(zip(columns, key)) for key in removed]}
+
+    def step_latency(self, step, since, bucket):
+        """Average and maximum duration of a step per time bucket"""
+        with self._lock:
+            return [dict(row) for row in self._db.execute(
+                "SELECT CAST(started / :bucket AS INTEGER) * :bucket AS bucket, COUNT(*) AS runs, "
+                "AVG(duration) AS avg_duration, MAX(duration) AS max_duration, SUM(1 - ok) AS failures "
+                "FROM steps WHERE step = :step AND started >= :since GROUP BY bucket ORDER BY bucket",
+                {"step": step, "since": since, "bucket": bucket})]
+
+    def failure_rates(self, since, bucket):
+        """Share of failed browser runs per time bucket; skipped runs are left out"""
+        with self._lock:
+            return [dict(row) for row in self._db.execute(
+                "SELECT CAST(started / :bucket AS INTEGER) * :bucket AS bucket, COUNT(*) AS runs, "
+                "SUM(outcome = 'failed') AS failed, SUM(outcome = 'upstream_failure') AS upstream_failures, "
+                "AVG(outcome != 'passed') AS failure_rate "
+                "FROM runs WHERE started >= :since AND outcome != 'skipped' GROUP BY bucket ORDER BY bucket",
+                {"since": since, "bucket": bucket})]
+
+    def step_failures(self, since):
+        """Failure counts and rates per step"""
+        with self._lock:
+            return [dict(row) for row in self._db.execute(
+                "SELECT step, COUNT(*) AS runs, SUM(1 - ok) AS failures, AVG(1 - ok) AS failure_rate "
+                "FROM steps WHERE started >= ? GROUP BY step ORDER BY failures DESC", (since,))]
+
+    def active_jobs(self):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(
+                "SELECT j.title, j.department, j.location, j.url, r.started AS first_seen FROM jobs j "
+                "JOIN runs r ON r.id = j.first_seen_run WHERE j.active = 1 ORDER BY j.title")]
+
+    def prune(self, older_than):
+        """Deletes runs and their steps that started before the given timestamp"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM steps WHERE started < ?", (older_than,))
+            self._db.execute("DELETE FROM runs WHERE started < ? AND id NOT IN "
+                             "(SELECT first_seen_run FROM jobs UNION SELECT last_seen_run FROM jobs)", (older_than,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trends and job history from the run history store")
+    parser.add_argument("db", help="SQLite file written by the test controller (RESULTS_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    trends = commands.add_parser("trends", help="Step latency over time")
+    trends.add_argument("--step", required=True)
+    failures = commands.add_parser("failures", help="Failure rates over time and per step")
+    for sub in (trends, failures):
+        sub.add_argument("--since", default="24h", help="How far back to look, e.g. 90m, 24h, 7d")
+        sub.add_argument("--bucket", default="1h", help="Bucket size, e.g. 15m, 1h, 1d")
+    commands.add_parser("jobs", help="Currently listed positions")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    if args.command == "jobs":
+        rows = [[job["title"], job["department"], job["location"], _format_time(job["first_seen"])]
+                for job in store.active_jobs()]
+        print(tabulate(rows, headers=["Job Name", "Department", "Location", "First seen"], tablefmt="pretty"))
+        return 0
+
+    since = time.time() - parse_duration(args.since)
+    bucket = parse_duration(args.bucket)
+    if args.command == "trends":
+        rows = [[_format_time(row["bucket"]), row["runs"], f"{row['avg_duration']:.2f}", f"{row['max_duration']:.2f}",
+                 row["failures"]] for row in store.step_latency(args.step, since, bucket)]
+        print(tabulate(rows, headers=["From", "Runs", "Avg s", "Max s", "Failures"], tablefmt="pretty"))
+    else:
+        rows = [[_format_time(row["bucket"]), row["runs"], row["failed"], row["upstream_failures"],
+                 f"{row['failure_rate'] * 100:.1f}%"] for row in store.failure_rates(since, bucket)]
+        print(tabulate(rows, headers=["From", "Runs", "Failed", "Upstream", "Failure rate"], tablefmt="pretty"))
+        rows = [[row["step"], row["runs"], row["failures"], f"{row['failure_rate'] * 100:.1f}%"]
+                for row in store.step_failures(since)]
+        print(tabulate(rows, headers=["Step", "Runs", "Failures", "Failure rate"], tablefmt="pretty"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
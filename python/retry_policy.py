@@ -0,0 +1,119 @@
+import time
+import random
+import threading
+import contextlib
+from selenium.common.exceptions import (WebDriverException, TimeoutException, InvalidSessionIdException,
+                                        NoSuchWindowException, SessionNotCreatedException)
+from waits import pause
+
+# Retry and deadline policy
+# Every step retries through a RetryPolicy (exponential backoff with jitter,
+# retryable vs fatal errors) and draws down one deadline per session, so a
+# failing session gives up quickly and frees its Chrome node.
+
+# WebDriver errors that mean the browser session itself is gone
+FATAL_MESSAGES = ("chrome not reachable", "disconnected", "session deleted", "target window already closed",
+                  "no such session", "invalid session id")
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """The session ran out of its time budget"""
+
+
+class FatalStepError(Exception):
+    """A failure that retrying cannot fix"""
+
+
+class Deadline:
+    """Wall-clock budget shared by every step of a session"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"Session deadline of {self.seconds}s exceeded")
+
+
+@contextlib.contextmanager
+def session_deadline(seconds):
+    """Makes a Deadline the current one for this thread for the duration of the block"""
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = Deadline(seconds)
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = previous
+
+
+@contextlib.contextmanager
+def shared_deadline(deadline):
+    """Makes an existing Deadline (or None) the current one for this thread, e.g. in a helper thread of the session"""
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
+
+def current_deadline():
+    return getattr(_local, "deadline", None)
+
+
+def is_fatal(error):
+    """True for errors after which the session cannot recover"""
+    if isinstance(error, (DeadlineExceeded, FatalStepError, InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    if isinstance(error, WebDriverException) and not isinstance(error, TimeoutException):
+        message = (error.msg or "").lower()
+        return any(fatal in message for fatal in FATAL_MESSAGES)
+    return False
+
+
+class RetryPolicy:
+    """Retries an operation with exponential backoff and jitter within the current deadline"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=5.0, multiplier=2.0, jitter=0.5,
+                 retryable=(Exception,), fatal=is_fatal):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryable = retryable
+        self.fatal = fatal
+
+    def delay(self, attempt):
+        """Backoff before the next attempt; jitter spreads retries of concurrent sessions"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(delay * (1 - self.jitter), delay)
+
+    def run(self, operation, deadline=None, on_retry=None):
+        """Calls operation(attempt) until it succeeds, a fatal error occurs or attempts run out"""
+        deadline = deadline or current_deadline()
+        for attempt in range(1, self.max_attempts + 1):
+            if deadline:
+                deadline.check()
+            try:
+                return operation(attempt)
+            except Exception as e:
+                if self.fatal(e) or not isinstance(e, self.retryable) or attempt == self.max_attempts:
+                    raise
+                delay = self.delay(attempt)
+                if deadline and deadline.remaining() <= delay:
+                    raise DeadlineExceeded(f"Session deadline of {deadline.seconds}s exceeded: {e}") from e
+                if on_retry:
+                    on_retry(attempt, e, delay)
+                pause(delay)
+
+
+# Session creation only retries while the grid has no free slot
+SESSION_CREATE_POLICY = RetryPolicy(max_attempts=5, base_delay=2.0, max_delay=10.0,
+                                    retryable=(SessionNotCreatedException,), fatal=lambda e: False)
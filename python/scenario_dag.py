@@ -0,0 +1,236 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import tracing
+from retry_policy import current_deadline, shared_deadline, is_fatal
+
+# Scenario DAG
+# Steps declare their preconditions instead of relying on their position in a
+# list: the step they follow, the URL they start from and the browser state
+# (e.g. consent cookies) an earlier step provides. Steps with their own start
+# URL branch off onto a separate session, which is created while the shared
+# prefix runs and seeded with the state the prefix captured instead of
+# replaying it. Branches that get no session of their own run afterwards on the
+# main one, so with a single session the steps run in declaration order.
+
+
+class Step:
+    """A scenario step and its preconditions"""
+
+    def __init__(self, run, after=None, start_url=None, requires=(), provides=()):
+        self.run = run  # Step function taking the driver and returning True on success
+        self.name = run.__name__
+        self.after = after  # Name of the step this one follows; it is skipped when that step failed
+        self.start_url = start_url  # Page the step starts on; without one it continues on its predecessor's page
+        self.requires = tuple(requires)  # Browser state the step needs, e.g. "consent"
+        self.provides = tuple(provides)  # Browser state available once the step has passed
+
+    @property
+    def detachable(self):
+        """True when the step does not need the page its predecessor left behind"""
+        return self.after is None or self.start_url is not None
+
+
+class ScenarioDag:
+    """Validated steps, planned onto branches that each run on one session"""
+
+    def __init__(self, steps):
+        self.steps = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step {step.name}")
+            if step.after is not None and step.after not in self.steps:
+                raise ValueError(f"{step.name} must be declared after the step it follows ({step.after})")
+            for state in step.requires:
+                if self.provider(step, state) is None:
+                    raise ValueError(f"{step.name} requires {state!r}, which no preceding step provides")
+            self.steps[step.name] = step
+        self.branches = self._plan()
+
+    def provider(self, step, state):
+        """The closest preceding step that provides state, or None"""
+        name = step.after
+        while name is not None:
+            if state in self.steps[name].provides:
+                return self.steps[name]
+            name = self.steps[name].after
+        return None
+
+    def _plan(self):
+        children = {}
+        for step in self.steps.values():
+            children.setdefault(step.after, []).append(step)
+        branches = []
+        branch_of = {}
+        for step in self.steps.values():
+            parent = branch_of.get(step.after)
+            continues = parent is not None and branches[parent][-1].name == step.after
+            if not step.detachable:
+                if not continues:
+                    raise ValueError(f"{step.name} continues on the page of {step.after}, but "
+                                     f"{branches[parent][-1].name} already does; give one of them a start_url")
+                branch = parent
+            elif continues and len(children[step.after]) == 1:
+                branch = parent  # Nothing else needs this session, so switching costs nothing
+            elif not branches:
+                branches.append([])
+                branch = 0
+            else:
+                branches.append([])
+                branch = len(branches) - 1
+            branches[branch].append(step)
+            branch_of[step.name] = branch
+        return branches
+
+
+class _Run:
+    """Progress of one DAG run shared by its branches"""
+
+    def __init__(self, dag):
+        self.done = {name: threading.Event() for name in dag.steps}
+        self.passed = {}
+        self.states = {}  # state name -> (captured value or None, driver it was captured on)
+        self.errors = []
+
+
+class DagRunner:
+    """Runs a ScenarioDag, spreading its branches over up to max_sessions sessions"""
+
+    def __init__(self, dag, acquire=None, release=None, navigate=None, states=None, max_sessions=1, step_budget=None,
+                 log=print):
+        self.dag = dag
+        self.acquire = acquire  # Returns a driver for a branch session
+        self.release = release  # Called with (driver, broken) once a branch session is done
+        self.navigate = navigate  # Called with (driver, url) to open a step's start_url
+        self.states = states or {}  # state name -> (capture(driver), apply(driver, captured))
+        self.max_sessions = max(1, max_sessions if acquire else 1)
+        # Returns a step's budget in seconds; the main branch waits at most the budget of a branch's first step
+        # for its session, then runs the branch itself
+        self.step_budget = step_budget
+        self.log = log
+
+    def run(self, driver, execute):
+        """Runs every step through execute(driver, step, call), where call() runs the step and returns its outcome.
+
+        A failed step skips the steps after it, but independent branches still run. Errors raised by
+        execute (fatal ones) end the run and are re-raised once every branch has stopped.
+        """
+        run = _Run(self.dag)
+        branches = self.dag.branches
+        threaded = list(range(1, min(len(branches), self.max_sessions)))
+        acquired = {index: threading.Event() for index in threaded}
+        sessions = {}
+        claimed = {}  # branch index -> "main" or "session", whichever took the branch first
+        claim_lock = threading.Lock()
+
+        def claim(index, by):
+            with claim_lock:
+                return claimed.setdefault(index, by) == by
+
+        parent_name = threading.current_thread().name
+        parent_span = tracing.current_span()
+        deadline = current_deadline()
+
+        def run_detached(index):
+            threading.current_thread().name = f"{parent_name}/{index + 1}"
+            try:
+                with tracing.attached(parent_span), shared_deadline(deadline):
+                    with tracing.span("acquire_branch_session", "internal", branch=index + 1):
+                        sessions[index] = self.acquire()
+            except Exception as e:
+                self.log(f"⚠️ No session for branch {index + 1}, it runs after the main branch: {e}")
+                return
+            finally:
+                acquired[index].set()
+            if not claim(index, "session"):
+                self.log(f"⚠️ Session for branch {index + 1} arrived after the main branch took the branch over.")
+                self.release(sessions[index], False)
+                return
+            broken = True
+            try:
+                with tracing.attached(parent_span), shared_deadline(deadline):
+                    broken = not self._run_branch(run, branches[index], sessions[index], execute)
+            finally:
+                self.release(sessions[index], broken)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, len(threaded)))
+        try:
+            futures = {index: pool.submit(run_detached, index) for index in threaded}
+            self._run_branch(run, branches[0], driver, execute)
+            for index in range(1, len(branches)):
+                if index in acquired:
+                    acquired[index].wait(self._wait_limit(branches[index]))
+                    if not claim(index, "main"):
+                        continue
+                self._run_branch(run, branches[index], driver, execute)
+            for index, future in futures.items():
+                if claimed.get(index) == "session":
+                    future.result()
+        finally:
+            # A session still being created for a branch the main branch took over is released when it arrives
+            pool.shutdown(wait=False)
+        if run.errors:
+            raise run.errors[0]
+
+    def _wait_limit(self, branch):
+        return self.step_budget(branch[0]) if self.step_budget else None
+
+    def _run_branch(self, run, branch, driver, execute):
+        """Runs the steps of one branch in order; returns False when it ended with an error"""
+        try:
+            for step in branch:
+                if run.errors:
+                    return True
+                if step.after is not None:
+                    run.done[step.after].wait()
+                    if not run.passed.get(step.after):
+                        run.passed[step.name] = False
+                        run.done[step.name].set()
+                        continue
+                ok = execute(driver, step, lambda: self._prepare(run, step, driver) and step.run(driver))
+                if ok:
+                    self._capture(run, step, driver)
+                run.passed[step.name] = bool(ok)
+                run.done[step.name].set()
+            return True
+        except Exception as e:
+            run.errors.append(e)
+            return False
+        finally:
+            for step in branch:
+                run.done[step.name].set()  # Never leave steps of other branches waiting
+
+    def _prepare(self, run, step, driver):
+        """Seeds required state captured on another session and opens the step's start URL"""
+        try:
+            for state in step.requires:
+                captured, source = run.states.get(state, (None, None))
+                if source is driver:
+                    continue  # Provided on this session, so the browser already has it
+                if captured is not None:
+                    self.states[state][1](driver, captured)
+                elif self.dag.provider(step, state).detachable:
+                    # Cache miss: rebuild the state by running its provider on this session
+                    provider = self.dag.provider(step, state)
+                    self.log(f"⚠️ No captured {state} state, replaying {provider.name} for {step.name}...")
+                    if not provider.run(driver):
+                        return False
+                else:
+                    self.log(f"⚠️ No captured {state} state for {step.name}, running without it.")
+            if step.start_url and self.navigate:
+                self.navigate(driver, step.start_url)
+            return True
+        except Exception as e:
+            if is_fatal(e):
+                raise
+            self.log(f"❌ Could not prepare {step.name}: {type(e).__name__}: {e}")
+            return False
+
+    def _capture(self, run, step, driver):
+        for state in step.provides:
+            captured = None
+            if state in self.states:
+                try:
+                    captured = self.states[state][0](driver)
+                except Exception as e:
+                    self.log(f"⚠️ Could not capture {state} state after {step.name}: {e}")
+            run.states[state] = (captured, driver)
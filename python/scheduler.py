@@ -0,0 +1,256 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tabulate import tabulate
+import tracing
+from session_queue import QueueFull, QueueTimeout
+
+# Parallel session scheduler
+# Keeps N independent WebDriver sessions in flight so that every selenium-chrome
+# replica (SE_NODE_MAX_SESSIONS=1) has a scenario to run.
+
+
+class SessionResult:
+    """Outcome of a single scenario session"""
+
+    def __init__(self, session_no, lane=None):
+        self.session_no = session_no
+        self.lane = lane  # Lane number when several scenarios share one browser session
+        self.started = time.time()
+        self.duration = 0.0
+        self.steps = {}  # step name -> {"ok": bool, "started": epoch seconds, "duration": seconds}
+        self.error = None
+        self.upstream_failure = False  # Set when a pre-flight probe failed and no browser was used
+        self.skipped = None  # Why the browser run was skipped, e.g. the job data is unchanged
+        self.jobs = None  # Job rows collected by the scenario, when it got that far
+        self.queue_wait = None  # Seconds spent waiting for a grid slot
+        self.rejected = None  # Set when the session queue turned the request away
+        self.lanes = []  # Per-lane results of a multiplexed session; they are reported instead of this one
+
+    @property
+    def label(self):
+        return f"{self.session_no}.{self.lane}" if self.lane else str(self.session_no)
+
+    @property
+    def ok(self):
+        return self.error is None and bool(self.steps) and all(step["ok"] for step in self.steps.values())
+
+    def record_step(self, name, ok, duration, started=None):
+        # Branches of a scenario run in parallel, so a step's start cannot be derived from the ones before it
+        self.steps[name] = {"ok": ok, "started": time.time() - duration if started is None else started,
+                            "duration": duration}
+
+
+class ResultAggregator:
+    """Thread-safe running totals of session results; results themselves are not kept"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"sessions": 0, "skipped": 0, "passed": 0, "failed": 0, "upstream_failures": 0}
+        self._total_duration = 0.0
+        self._max_duration = 0.0
+        self._step_failures = {}
+
+    def add(self, result):
+        with self._lock:
+            if result.skipped:
+                self._counts["skipped"] += 1
+                return
+            self._counts["sessions"] += 1
+            self._counts["passed" if result.ok else "failed"] += 1
+            self._counts["upstream_failures"] += bool(result.upstream_failure)
+            self._total_duration += result.duration
+            self._max_duration = max(self._max_duration, result.duration)
+            for name, step in result.steps.items():
+                self._step_failures[name] = self._step_failures.get(name, 0) + (not step["ok"])
+
+    def summary(self):
+        """Returns pass/fail counts, durations and per-step failure counts"""
+        with self._lock:
+            sessions = self._counts["sessions"]
+            return dict(self._counts,
+                        mean_duration=self._total_duration / sessions if sessions else 0.0,
+                        max_duration=self._max_duration,
+                        step_failures=dict(self._step_failures))
+
+    def format_summary(self):
+        summary = self.summary()
+        rows = [
+            ["Sessions", summary["sessions"]],
+            ["Skipped (unchanged data)", summary["skipped"]],
+            ["Passed", summary["passed"]],
+            ["Failed", summary["failed"]],
+            ["Upstream failures", summary["upstream_failures"]],
+            ["Mean duration (s)", f"{summary['mean_duration']:.1f}"],
+            ["Max duration (s)", f"{summary['max_duration']:.1f}"],
+        ]
+        rows += [[f"Failures in {name}", count] for name, count in summary["step_failures"].items()]
+        return tabulate(rows, headers=["Metric", "Value"], tablefmt="pretty")
+
+
+class SessionScheduler:
+    """Runs a scenario on up to `concurrency` isolated sessions at once"""
+
+    def __init__(self, create_driver, scenario, concurrency=1, interval=10, summary_every=10, log=print, pool=None,
+                 on_result=None, preflight=None, gate=None, queue=None, queue_timeout=None):
+        self.create_driver = create_driver
+        self.queue = queue  # Optional SessionQueue that admits sessions to free grid slots
+        self.queue_timeout = queue_timeout
+        self.gate = gate  # Called with the session number; returns a reason to skip the browser run, or None
+        self.preflight = preflight  # Returns failure descriptions; any failure skips the browser run
+        self.on_result = on_result  # Called with every finished SessionResult
+        self.pool = pool  # Optional SessionPool; without it every session gets a fresh driver
+        self.scenario = scenario
+        self.concurrency = max(1, concurrency)
+        self.interval = interval
+        self.summary_every = summary_every
+        self.log = log
+        self.results = ResultAggregator()
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _next_session_no(self):
+        with self._counter_lock:
+            self._counter += 1
+            return self._counter
+
+    def run_session(self):
+        """Runs the scenario on a dedicated driver and always releases it"""
+        result = SessionResult(self._next_session_no())
+        threading.current_thread().name = f"session-{result.session_no}"
+        start = time.monotonic()
+        with tracing.span("session", "session", session_no=result.session_no):
+            result.skipped = self.gate(result.session_no) if self.gate else None
+            if result.skipped:
+                tracing.set_attribute("skipped", result.skipped)
+                result.duration = time.monotonic() - start
+                return self._finish(result)
+            failures = self._run_preflight()
+            if failures:
+                # The sites are down, so no grid slot is taken for a run that cannot pass
+                result.upstream_failure = True
+                result.error = f"Upstream failure: {'; '.join(failures)}"
+            else:
+                self._run_queued(result)
+            result.duration = time.monotonic() - start
+        return self._finish(result)
+
+    def _run_queued(self, result):
+        if not self.queue:
+            self._run_on_session(result)
+            return
+        try:
+            with tracing.span("queue", "internal"):
+                result.queue_wait = self.queue.acquire(self.queue_timeout)
+        except (QueueFull, QueueTimeout) as e:
+            # Backpressure: the request is dropped instead of piling up on busy nodes
+            result.rejected = "full" if isinstance(e, QueueFull) else "timeout"
+            result.error = f"{type(e).__name__}: {e}"
+            return
+        try:
+            self._run_on_session(result)
+        finally:
+            self.queue.release()
+
+    def _run_on_session(self, result):
+        driver = None
+        try:
+            with tracing.span("acquire_session", "internal", pooled=bool(self.pool)):
+                driver = self._open_driver()
+            self.scenario(driver, result)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            if driver is not None:
+                with tracing.span("release_session", "internal"):
+                    # An unexpected error may have left the session unusable, so it is not reused
+                    self._close_driver(driver, broken=result.error is not None)
+
+    def _open_driver(self, timeout=None):
+        if not self.pool:
+            return self.create_driver()
+        pooled = self.pool.acquire(timeout)
+        pooled.driver._tt4i_pooled = pooled
+        return pooled.driver
+
+    def _close_driver(self, driver, broken):
+        pooled = getattr(driver, "_tt4i_pooled", None)
+        if pooled is not None:
+            self.pool.release(pooled, broken=broken)
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def open_session(self, timeout=None):
+        """Opens one more session for a running scenario (e.g. a DAG branch) through the same queue and pool"""
+        if self.queue:
+            self.queue.acquire(self.queue_timeout if timeout is None else timeout)
+        try:
+            return self._open_driver(timeout)
+        except Exception:
+            if self.queue:
+                self.queue.release()
+            raise
+
+    def close_session(self, driver, broken=False):
+        """Returns a session opened with open_session"""
+        try:
+            self._close_driver(driver, broken)
+        finally:
+            if self.queue:
+                self.queue.release()
+
+    def _run_preflight(self):
+        if not self.preflight:
+            return []
+        with tracing.span("preflight", "internal"):
+            try:
+                return self.preflight()
+            except Exception as e:
+                return [f"pre-flight check crashed: {e}"]
+
+    def _finish(self, result):
+        for finished in result.lanes or [result]:
+            self.results.add(finished)
+            if self.on_result:
+                try:
+                    self.on_result(finished)
+                except Exception as e:
+                    self.log(f"⚠️ Result listener failed for session {finished.label}: {type(e).__name__}: {e}")
+            if finished.skipped:
+                self.log(f"⏭️ Session {finished.label} skipped: {finished.skipped}")
+            elif finished.ok:
+                self.log(f"✅ Session {finished.label} passed in {finished.duration:.1f}s.")
+            else:
+                self.log(f"❌ Session {finished.label} failed in {finished.duration:.1f}s: "
+                         f"{finished.error or 'step failures'}")
+        if self.summary_every and result.session_no % self.summary_every == 0:
+            print(self.results.format_summary())
+        return result
+
+    def run_batch(self, count):
+        """Runs `count` sessions with the configured concurrency and returns their results"""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="session") as pool:
+            return list(pool.map(lambda _: self.run_session(), range(count)))
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                self.run_session()
+            except Exception as e:
+                # An escaped error must not silently end the worker and drop concurrency
+                self.log(f"❌ Session worker error: {type(e).__name__}: {e}")
+            self._stop.wait(self.interval)
+
+    def run_forever(self):
+        """Keeps `concurrency` sessions in flight until stop() is called"""
+        self.log(f"🔄 Starting {self.concurrency} concurrent session worker(s)...")
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="session") as pool:
+            for _ in range(self.concurrency):
+                pool.submit(self._worker)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,180 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cdp import execute_cdp
+from browser_state import remove_storage_scripts
+
+# Warm WebDriver session pool
+# Keeps sessions open between runs so a run does not pay Chrome startup, and
+# resets them to a clean state (no cookies, storage or extra tabs) in between.
+
+# Origins the scenario writes storage for; cleared on every reset
+RESET_ORIGINS = [
+    "https://useinsider.com",
+    "https://jobs.lever.co",
+]
+
+STORAGE_TYPES = "local_storage,session_storage,indexeddb,websql,cache_storage,service_workers"
+
+
+class PooledSession:
+    """A warm driver plus the bookkeeping needed to decide when to recycle it"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.home = driver.current_window_handle  # Window the session is reset to; scenarios may open and close others
+        self.runs = 0
+        self.created = time.monotonic()
+
+
+class SessionPool:
+    """Hands out warm, health-checked sessions and resets them between runs"""
+
+    def __init__(self, create_driver, size, max_runs=20, max_memory_mb=512, max_age=1800, log=print):
+        self.create_driver = create_driver
+        self.size = max(1, size)
+        self.max_runs = max_runs
+        self.max_memory_mb = max_memory_mb
+        # Memory is read from the session's current target only, so age bounds the growth it cannot see
+        self.max_age = max_age
+        self.log = log
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def warm(self):
+        """Opens all sessions up front, in parallel"""
+        def open_one(_):
+            try:
+                self._add_idle(PooledSession(self.create_driver()))
+            except Exception as e:
+                self.log(f"⚠️ Could not warm a pooled session: {e}")
+                with self._cond:
+                    self._total -= 1
+
+        with self._cond:
+            missing = self.size - self._total
+            self._total += missing
+        with ThreadPoolExecutor(max_workers=missing or 1) as pool:
+            list(pool.map(open_one, range(missing)))
+        self.log(f"✅ Session pool warmed: {len(self._idle)}/{self.size} session(s) ready.")
+
+    def _add_idle(self, session):
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    def _discard(self, session):
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """Returns a healthy session, creating one if the pool is not full yet"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._total >= self.size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No pooled session became available")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    session = self._idle.pop()
+                else:
+                    session = None
+                    self._total += 1  # Reserve the slot while the session is being created
+            if session is None:
+                try:
+                    return PooledSession(self.create_driver())
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            if self.is_healthy(session):
+                return session
+            self.log("⚠️ Pooled session failed its health check, replacing it...")
+            self._discard(session)
+
+    def release(self, session, broken=False):
+        """Returns a session to the pool, recycling it when broken, worn out or too large"""
+        session.runs += 1
+        if self._closed or broken:
+            self._discard(session)
+            return
+        if session.runs >= self.max_runs:
+            self.log(f"♻️ Recycling session after {session.runs} runs.")
+            self._discard(session)
+            return
+        memory_mb = self.memory_mb(session)
+        if memory_mb is not None and memory_mb > self.max_memory_mb:
+            self.log(f"♻️ Recycling session using {memory_mb:.0f}MB of JS heap.")
+            self._discard(session)
+            return
+        age = time.monotonic() - session.created
+        if self.max_age and age >= self.max_age:
+            self.log(f"♻️ Recycling session after {age:.0f}s.")
+            self._discard(session)
+            return
+        try:
+            self.reset(session)
+        except Exception as e:
+            self.log(f"⚠️ Session reset failed, discarding it: {e}")
+            self._discard(session)
+            return
+        self._add_idle(session)
+
+    @staticmethod
+    def is_healthy(session):
+        """Checks that the session still answers and has a usable window"""
+        try:
+            return session.driver.execute_script("return 1") == 1 and bool(session.driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def memory_mb(session):
+        """Returns the JS heap Chrome has allocated for the session's current target in MB, or None"""
+        try:
+            execute_cdp(session.driver, "Performance.enable")
+            metrics = {metric["name"]: metric["value"]
+                       for metric in execute_cdp(session.driver, "Performance.getMetrics")["metrics"]}
+        except Exception:
+            return None
+        # The allocated heap, not only its live objects, is what the renderer holds on to
+        total = metrics.get("JSHeapTotalSize") or metrics.get("JSHeapUsedSize")
+        return total / (1024 * 1024) if total else None
+
+    @staticmethod
+    def reset(session):
+        """Closes all but the original tab, clears cookies, storage and seeding scripts and opens about:blank"""
+        driver = session.driver
+        for handle in driver.window_handles:
+            if handle != session.home:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(session.home)
+        remove_storage_scripts(driver)  # Left behind when consent seeding failed halfway
+        try:
+            execute_cdp(driver, "Network.clearBrowserCookies")
+            for origin in RESET_ORIGINS:
+                execute_cdp(driver, "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": STORAGE_TYPES})
+        except Exception:
+            # Without CDP only the current origin can be cleared
+            driver.delete_all_cookies()
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        driver.get("about:blank")
+
+    def close(self):
+        """Quits every idle session; sessions in use are quit when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._discard(session)
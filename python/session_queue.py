@@ -0,0 +1,97 @@
+import math
+import time
+import threading
+import contextlib
+
+# Session request queue
+# Sessions wait here for a free grid slot instead of retrying against busy
+# nodes. Depth, wait time and slot utilization are exported as metrics, and the
+# queue rejects new requests once it is full (backpressure). The demand metric
+# (sessions running + waiting) is what the example HPA in
+# yaml/chrome-node-hpa-queue.yaml scales selenium-chrome on.
+
+POLL_INTERVAL = 1.0  # Seconds between capacity checks while requests are waiting
+
+
+class QueueFull(Exception):
+    """The queue already holds max_depth waiting requests"""
+
+
+class QueueTimeout(Exception):
+    """No grid slot became free within the queue timeout"""
+
+
+def desired_replicas(current, metric_total, target_per_replica, tolerance=0.1, min_replicas=1, max_replicas=None):
+    """Replica count the Kubernetes HPA picks for an AverageValue metric target"""
+    if current and abs(metric_total / (current * target_per_replica) - 1) <= tolerance:
+        desired = current
+    else:
+        desired = math.ceil(metric_total / target_per_replica)
+    desired = max(min_replicas, desired)
+    return min(max_replicas, desired) if max_replicas else desired
+
+
+class SessionQueue:
+    """FIFO admission of session requests to the grid's slots"""
+
+    def __init__(self, capacity, max_depth=50, on_change=None):
+        self.capacity = capacity  # Returns the number of grid slots, or None when unknown (no queueing)
+        self.max_depth = max_depth
+        self.on_change = on_change  # Called with (depth, in_use, capacity) on every change
+        self._cond = threading.Condition()
+        self._waiting = []  # Tickets in arrival order
+        self._in_use = 0
+
+    def stats(self):
+        with self._cond:
+            return len(self._waiting), self._in_use
+
+    def _notify(self, capacity):
+        if self.on_change:
+            self.on_change(len(self._waiting), self._in_use, capacity)
+
+    def acquire(self, timeout=None):
+        """Waits for a free slot in arrival order; returns the time spent waiting"""
+        ticket = object()
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            if len(self._waiting) >= self.max_depth:
+                raise QueueFull(f"Session queue is full ({self.max_depth} waiting)")
+            self._waiting.append(ticket)
+        capacity = None
+        try:
+            while True:
+                capacity = self.capacity()  # May poll the nodes, so it is read outside the lock
+                with self._cond:
+                    if self._waiting[0] is ticket and (capacity is None or self._in_use < capacity):
+                        self._in_use += 1
+                        break
+                    self._notify(capacity)
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise QueueTimeout(f"No grid slot became free within {timeout}s")
+                    # Capacity changes (new replicas) are not signalled, so it is polled
+                    self._cond.wait(POLL_INTERVAL if remaining is None else min(POLL_INTERVAL, remaining))
+        finally:
+            with self._cond:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+                self._notify(capacity)
+        return time.monotonic() - start
+
+    def release(self):
+        capacity = self.capacity()
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+            self._notify(capacity)
+
+    @contextlib.contextmanager
+    def slot(self, timeout=None):
+        """Holds a grid slot for the duration of the block; yields the queue wait time"""
+        waited = self.acquire(timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
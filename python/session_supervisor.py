@@ -0,0 +1,136 @@
+import json
+import time
+import threading
+import urllib.request
+
+# Session lifecycle supervisor
+# Tracks every WebDriver session the controller opens and makes sure it is
+# released: quits that fail are retried as a direct DELETE, all tracked sessions
+# are closed on shutdown, and a reaper periodically reads the grid's /status and
+# deletes sessions nobody here owns (e.g. left behind by a crashed controller),
+# instead of letting them block a node until SE_NODE_SESSION_TIMEOUT.
+
+
+def _http(method, url, timeout):
+    request = urllib.request.Request(url, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read()
+    return json.loads(body) if body else {}
+
+
+def grid_sessions(status):
+    """Returns (session_id, node_uri) for every busy slot in a grid /status response"""
+    sessions = []
+    for node in status.get("value", {}).get("nodes", []):
+        for slot in node.get("slots", []):
+            session = slot.get("session")
+            if session and session.get("sessionId"):
+                sessions.append((session["sessionId"], node.get("uri")))
+    return sessions
+
+
+def executor_url(driver):
+    """The URL the driver sends its commands to, i.e. the node or grid that owns the session"""
+    url = getattr(driver, "_tt4i_node_url", None)  # Recorded by create_driver
+    if url:
+        return url
+    executor = getattr(driver, "command_executor", None)
+    config = getattr(executor, "_client_config", None)
+    # Selenium 4.x keeps the URL in the client config; older releases had it on the executor
+    return getattr(config, "remote_server_addr", None) or getattr(executor, "_url", None)
+
+
+class SessionSupervisor:
+    """Tracks live sessions, guarantees they are deleted and reaps orphans found on the grid"""
+
+    def __init__(self, grid_url, orphan_grace=60, reap_interval=30, timeout=10, log=print, on_reap=None,
+                 grid_urls=None):
+        self.grid_url = grid_url.rstrip("/")
+        self.grid_urls = grid_urls or (lambda: [self.grid_url])  # Every endpoint whose /status is checked
+        self.orphan_grace = orphan_grace
+        self.reap_interval = reap_interval
+        self.timeout = timeout
+        self.log = log
+        self.on_reap = on_reap  # Called with the id of every reaped session
+        self._lock = threading.Lock()
+        self._sessions = {}  # session id -> driver
+        self._suspects = {}  # untracked session id -> first time it was seen on the grid
+        self._stop = threading.Event()
+        self._thread = None
+
+    def session_listener(self, event, driver, error):
+        """Session listener for instrumentation.add_session_listener"""
+        if event == "start":
+            with self._lock:
+                self._sessions[driver.session_id] = driver
+        elif event == "quit":
+            with self._lock:
+                self._sessions.pop(driver.session_id, None)
+            if error is not None:
+                # Routed sessions live on a specific node, not behind the grid Service
+                self.delete_session(driver.session_id, executor_url(driver))
+
+    def tracked(self):
+        with self._lock:
+            return set(self._sessions)
+
+    def delete_session(self, session_id, base_url=None):
+        """Deletes a session over plain HTTP; returns False when the grid could not be reached"""
+        for url in filter(None, (base_url, self.grid_url)):
+            try:
+                _http("DELETE", f"{url.rstrip('/')}/session/{session_id}", self.timeout)
+                return True
+            except Exception as e:
+                last_error = e
+        self.log(f"⚠️ Could not delete session {session_id}: {last_error}")
+        return False
+
+    def reap(self):
+        """Deletes grid sessions that are not tracked here and have been seen for longer than the grace period"""
+        now = time.monotonic()
+        seen = set()
+        reaped = []
+        for url in self.grid_urls():
+            try:
+                sessions = grid_sessions(_http("GET", f"{url.rstrip('/')}/status", self.timeout))
+            except Exception as e:
+                self.log(f"⚠️ Could not read grid status from {url}: {e}")
+                continue
+            tracked = self.tracked()
+            for session_id, node_uri in sessions:
+                if session_id in tracked:
+                    continue
+                seen.add(session_id)
+                # The grace period covers sessions that are still being handed to a driver here
+                first_seen = self._suspects.setdefault(session_id, now)
+                if now - first_seen >= self.orphan_grace and self.delete_session(session_id, node_uri or url):
+                    reaped.append(session_id)
+        self._suspects = {sid: at for sid, at in self._suspects.items() if sid in seen and sid not in reaped}
+        for session_id in reaped:
+            self.log(f"🧹 Reaped orphaned grid session {session_id}.")
+            if self.on_reap:
+                self.on_reap(session_id)
+        return reaped
+
+    def _loop(self):
+        while not self._stop.wait(self.reap_interval):
+            try:
+                self.reap()
+            except Exception as e:
+                self.log(f"⚠️ Orphan reaper failed: {e}")
+
+    def start(self):
+        """Starts the reaper in a daemon thread"""
+        self._thread = threading.Thread(target=self._loop, name="session-reaper", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stops the reaper and deletes every session that is still tracked"""
+        self._stop.set()
+        with self._lock:
+            sessions, self._sessions = dict(self._sessions), {}
+        for driver in sessions.values():
+            try:
+                driver.quit()
+            except Exception:
+                pass  # session_listener already fell back to a direct DELETE
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import shlex
+import tempfile
+import unittest
+from unittest import mock
+
+from deploy_and_run import DeployEngine, Kubectl, default_stages, parse_files
+
+# Deploy engine against fake_kubectl.py
+# Runs the real engine and kubectl subprocesses with the fake standing in for the
+# cluster, with its latencies shortened so a deployment takes a few seconds.
+
+FAKE_KUBECTL = f"{shlex.quote(sys.executable)} {shlex.quote(os.path.join(os.path.dirname(__file__), 'fake_kubectl.py'))}"
+
+
+class DeployEngineTest(unittest.TestCase):
+    def setUp(self):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        env = mock.patch.dict(os.environ, {"FAKE_KUBECTL_STATE": state_dir.name, "FAKE_APPLY_SECONDS": "0.1",
+                                           "FAKE_STARTING_SECONDS": "0.2", "FAKE_READY_SECONDS": "0.5"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.lines = []
+
+    def deploy(self, kubectl=FAKE_KUBECTL, timeout=20):
+        engine = DeployEngine(default_stages(parse_files([])), Kubectl(kubectl), timeout=timeout,
+                              log=self.lines.append)
+        start = time.monotonic()
+        ready = engine.run()
+        return engine, ready, time.monotonic() - start
+
+    def test_stages_follow_their_dependencies(self):
+        engine, ready, _ = self.deploy()
+        self.assertTrue(ready, "\n".join(self.lines))
+        timings = engine.timings
+        self.assertEqual(set(timings), {"chrome-node", "chrome-node-hpa", "test-controller"})
+        self.assertLess(timings["chrome-node"]["applied"], timings["chrome-node-hpa"]["applied"])
+        # The controller waits for a ready selenium-chrome endpoint, i.e. for chrome-node to be ready
+        self.assertLessEqual(timings["chrome-node"]["ready"], timings["test-controller"]["applied"])
+        self.assertLess(timings["test-controller"]["applied"], timings["test-controller"]["ready"])
+
+    def test_failed_apply_fails_its_dependents_fast(self):
+        with mock.patch.dict(os.environ, {"FAKE_FAIL": "chrome-node"}):
+            engine, ready, elapsed = self.deploy()
+        self.assertFalse(ready)
+        self.assertEqual(engine.timings, {})
+        self.assertLess(elapsed, 10)
+        failures = [line for line in self.lines if "❌" in line]
+        self.assertEqual(len(failures), 3, "\n".join(self.lines))
+        self.assertIn("injected failure", failures[0])
+
+    def test_missing_kubectl_fails_fast(self):
+        engine, ready, elapsed = self.deploy(kubectl="/nonexistent/kubectl")
+        self.assertFalse(ready)
+        self.assertLess(elapsed, 10)
+        self.assertTrue(any("Could not" in line for line in self.lines), "\n".join(self.lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import time
+import threading
+import unittest
+from unittest import mock
+
+import session_queue
+from queue_simulator import generate_arrivals, simulate
+from session_queue import SessionQueue, QueueFull, QueueTimeout
+
+# Queue simulator and session queue admission
+# The simulator runs with fixed seeds, so its results are exact; a change in the
+# queue model or the HPA formula shows up as a different summary.
+
+
+class QueueSimulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.arrivals = generate_arrivals("burst", 1800, 2, 12, seed=1)
+
+    def test_fixed_seed_is_reproducible(self):
+        self.assertEqual(generate_arrivals("burst", 1800, 2, 12, seed=1), self.arrivals)
+        self.assertEqual(simulate(self.arrivals, seed=1), simulate(self.arrivals, seed=1))
+
+    def test_burst_summary(self):
+        _, summary = simulate(self.arrivals, seed=1)
+        self.assertEqual(summary["requests"], 95)
+        self.assertEqual((summary["served"], summary["rejected"], summary["timed_out"]), (80, 0, 15))
+        self.assertEqual(summary["max_replicas"], 5)
+        self.assertAlmostEqual(summary["wait_p50"], 35.45, places=2)
+        self.assertLessEqual(summary["wait_max"], 120)
+
+    def test_every_request_is_served_rejected_or_timed_out(self):
+        for max_replicas, max_depth in ((1, 3), (1, 50), (5, 50), (10, 50)):
+            _, summary = simulate(self.arrivals, max_replicas=max_replicas, max_depth=max_depth, seed=1)
+            self.assertEqual(summary["served"] + summary["rejected"] + summary["timed_out"], summary["requests"])
+            self.assertLessEqual(summary["max_replicas"], max_replicas)
+
+    def test_full_queue_rejects(self):
+        _, summary = simulate(self.arrivals, max_replicas=1, max_depth=3, seed=1)
+        self.assertEqual((summary["served"], summary["rejected"], summary["timed_out"]), (32, 52, 11))
+
+    def test_enough_capacity_admits_everything(self):
+        _, summary = simulate(self.arrivals, max_replicas=10, startup=0, seed=1)
+        self.assertEqual((summary["served"], summary["rejected"], summary["timed_out"]), (95, 0, 0))
+
+    def test_requests_are_admitted_in_arrival_order(self):
+        timeline, summary = simulate([0, 0, 0], session_seconds=10, max_replicas=1, max_depth=2, queue_timeout=15,
+                                     seed=1)
+        self.assertEqual((summary["served"], summary["rejected"]), (2, 1))
+        self.assertEqual(summary["wait_p50"], 4.5)  # The first request waits 0s, the second until the first ends
+        self.assertEqual(timeline[0][1:3], [1, 1])  # One waiting, one running
+
+
+class SessionQueueTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(session_queue, "POLL_INTERVAL", 0.01)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_admits_up_to_capacity(self):
+        queue = SessionQueue(lambda: 1)
+        self.assertLess(queue.acquire(timeout=1), 0.5)
+        self.assertEqual(queue.stats(), (0, 1))
+        with self.assertRaises(QueueTimeout):
+            queue.acquire(timeout=0.05)
+        queue.release()
+        self.assertEqual(queue.stats(), (0, 0))
+
+    def test_rejects_when_full(self):
+        queue = SessionQueue(lambda: 0, max_depth=1)
+        errors = []
+        waiter = threading.Thread(target=lambda: self._acquire(queue, 0.5, errors))
+        waiter.start()
+        self._wait_for(lambda: queue.stats()[0] == 1)
+        with self.assertRaises(QueueFull):
+            queue.acquire(timeout=0.1)
+        waiter.join()
+        self.assertIsInstance(errors[0], QueueTimeout)
+
+    def test_waiters_are_admitted_in_order(self):
+        slots = [0]
+        queue = SessionQueue(lambda: slots[0])
+        admitted = []
+        threads = []
+        for name in ("first", "second"):
+            threads.append(threading.Thread(target=lambda name=name: self._acquire(queue, 5, admitted, name)))
+            threads[-1].start()
+            self._wait_for(lambda: queue.stats()[0] == len(threads))
+        slots[0] = 1
+        self._wait_for(lambda: admitted)
+        self.assertEqual((admitted, queue.stats()), (["first"], (1, 1)))
+        slots[0] = 2
+        for thread in threads:
+            thread.join()
+        self.assertEqual(admitted, ["first", "second"])
+
+    @staticmethod
+    def _acquire(queue, timeout, outcomes, name=None):
+        try:
+            queue.acquire(timeout)
+            outcomes.append(name)
+        except Exception as e:
+            outcomes.append(e)
+
+    @staticmethod
+    def _wait_for(condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("condition not met in time")
+            time.sleep(0.005)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import json
+import argparse
+from collections import OrderedDict
+
+# Trace analyzer
+# Prints a flame-style breakdown of where a session's wall-clock time went,
+# using the JSON-lines spans written by tracing.py.
+#
+#   python trace_report.py traces.jsonl              # latest session
+#   python trace_report.py traces.jsonl --all        # all sessions aggregated
+#   python trace_report.py traces.jsonl --trace <id> --locators
+
+BAR_WIDTH = 30
+
+
+def load_spans(path):
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def duration(span):
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+
+
+def label(span, locators):
+    locator = span.get("attributes", {}).get("locator")
+    return f"{span['name']} [{locator}]" if locators and locator else span["name"]
+
+
+def build_tree(spans, locators=False):
+    """Aggregates spans by their name path into {path: {"count", "total", "self"}}"""
+    by_id = {span["spanId"]: span for span in spans}
+    children_time = {}
+    for span in spans:
+        if span.get("parentSpanId") in by_id:
+            children_time[span["parentSpanId"]] = children_time.get(span["parentSpanId"], 0.0) + duration(span)
+
+    def path(span):
+        names = []
+        while span is not None:
+            names.append(label(span, locators))
+            span = by_id.get(span.get("parentSpanId"))
+        return tuple(reversed(names))
+
+    tree = OrderedDict()
+    for span in sorted(spans, key=lambda s: s["startTimeUnixNano"]):
+        node = tree.setdefault(path(span), {"count": 0, "total": 0.0, "self": 0.0})
+        node["count"] += 1
+        node["total"] += duration(span)
+        node["self"] += max(0.0, duration(span) - children_time.get(span["spanId"], 0.0))
+    return tree
+
+
+def print_tree(tree, root_total, max_depth=None, out=sys.stdout):
+    rows = []
+    for node_path, node in tree.items():
+        depth = len(node_path) - 1
+        if max_depth is not None and depth > max_depth:
+            continue
+        rows.append((node_path, node))
+
+    def sort_key(item):
+        # Keep children under their parent, heaviest siblings first
+        node_path = item[0]
+        return tuple((-tree[node_path[:i + 1]]["total"], node_path[i]) for i in range(len(node_path)))
+
+    out.write(f"{'span':<60} {'count':>6} {'total s':>9} {'self s':>9} {'%':>6}\n")
+    for node_path, node in sorted(rows, key=sort_key):
+        share = node["total"] / root_total if root_total else 0.0
+        name = ("  " * (len(node_path) - 1) + node_path[-1])[:60]
+        bar = "█" * int(round(share * BAR_WIDTH))
+        out.write(f"{name:<60} {node['count']:>6} {node['total']:>9.2f} {node['self']:>9.2f} {share * 100:>5.1f}% {bar}\n")
+
+
+def summarize(spans, out=sys.stdout):
+    """Splits wall-clock time into WebDriver round trips and client-side time"""
+    sessions = [s for s in spans if s.get("kind") == "session"]
+    wall = sum(duration(s) for s in sessions) or sum(duration(s) for s in spans if not s.get("parentSpanId"))
+    commands = sum(duration(s) for s in spans if s.get("kind") == "webdriver")
+    out.write(f"\nSessions: {len(sessions)}  wall-clock: {wall:.2f}s\n")
+    if wall:
+        out.write(f"WebDriver round trips (grid hop + Chrome): {commands:.2f}s ({commands / wall * 100:.1f}%)\n")
+        out.write(f"Client side (sleeps, polling gaps, Python): {wall - commands:.2f}s "
+                  f"({(wall - commands) / wall * 100:.1f}%)\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flame-style breakdown of traced test sessions")
+    parser.add_argument("path", help="JSON-lines trace file written by tracing.py")
+    parser.add_argument("--trace", help="Trace id of the session to analyse (default: latest)")
+    parser.add_argument("--all", action="store_true", help="Aggregate every session in the file")
+    parser.add_argument("--depth", type=int, help="Maximum depth to print (0 = session only)")
+    parser.add_argument("--locators", action="store_true", help="Split WebDriver commands by locator")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.path)
+    if not spans:
+        print("No spans found.")
+        return 1
+    if not args.all:
+        trace_id = args.trace or max(spans, key=lambda s: s["startTimeUnixNano"])["traceId"]
+        spans = [s for s in spans if s["traceId"] == trace_id]
+        if not spans:
+            print(f"Trace {trace_id} not found.")
+            return 1
+        print(f"Trace {trace_id}\n")
+
+    tree = build_tree(spans, args.locators)
+    roots = [node for node_path, node in tree.items() if len(node_path) == 1]
+    print_tree(tree, sum(node["total"] for node in roots), args.depth)
+    summarize(spans)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+# Session tracing
+# Records nested spans (session > step > WebDriver command) and exports them as
+# JSON lines using OTLP span field names, so they can be analysed with
+# trace_report.py or converted for any OTLP-compatible backend.
+
+_local = threading.local()
+
+
+class Span:
+    """A timed operation inside a session trace"""
+
+    def __init__(self, name, kind, parent=None, attributes=None, start=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.start = time.time() if start is None else start
+        self.end = None
+        self.status = "OK"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, end=None, error=None):
+        self.end = time.time() if end is None else end
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"[:500]
+
+    def to_dict(self):
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int(self.end * 1e9),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class MemoryExporter:
+    """Keeps finished spans in memory, e.g. for benchmarks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = []
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span.to_dict())
+
+
+class JsonLinesExporter:
+    """Appends finished spans to a JSON-lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_exporter = None
+
+
+def configure(path=None, exporter=None):
+    """Enables tracing to the given JSON-lines file or exporter; neither disables it"""
+    global _exporter
+    _exporter = exporter or (JsonLinesExporter(path) if path else None)
+
+
+def enabled():
+    return _exporter is not None
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextlib.contextmanager
+def span(name, kind="internal", **attributes):
+    """Opens a span nested under the current one for the duration of the block"""
+    if not enabled():
+        yield None
+        return
+    current = Span(name, kind, current_span(), attributes)
+    stack = _stack()
+    stack.append(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        stack.pop()
+        current.finish(error=error)
+        _exporter.export(current)
+
+
+@contextlib.contextmanager
+def attached(parent):
+    """Nests the spans this thread opens under parent, a span of another thread"""
+    if parent is None:
+        yield
+        return
+    stack = _stack()
+    stack.append(parent)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def set_attribute(key, value):
+    """Sets an attribute on the innermost open span, e.g. the retry attempt of a step"""
+    current = current_span()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+def _inherited(key):
+    for parent in reversed(_stack()):
+        if key in parent.attributes:
+            return parent.attributes[key]
+    return None
+
+
+def record_command(command, params, started, duration, error):
+    """Command listener that records each WebDriver command as a child span"""
+    if not enabled():
+        return
+    attributes = {"command": command}
+    if params and "using" in params and "value" in params:
+        attributes["locator"] = f"{params['using']}={params['value']}"
+    attempt = _inherited("attempt")
+    if attempt is not None:
+        attributes["attempt"] = attempt
+    end = time.time() - (time.monotonic() - started - duration)
+    command_span = Span(command, "webdriver", current_span(), attributes, start=end - duration)
+    command_span.finish(end=end, error=error)
+    _exporter.export(command_span)
@@ -0,0 +1,151 @@
+import time
+import tracing
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
+
+# Event-driven waits
+# Every wait polls a real page condition (DOM mutations, in-flight requests,
+# running animations, element text) instead of sleeping for a fixed time.
+
+POLL_INTERVAL = 0.1
+DOM_QUIET_MS = 300
+NETWORK_IDLE_MS = 500
+
+# Installs the page probes once per document and reports the page state in a single round trip
+PAGE_STATE_SCRIPT = """
+if (!window.__tt4iProbes) {
+    window.__tt4iProbes = true;
+    window.__tt4iLastMutation = performance.now();
+    window.__tt4iInflight = 0;
+    new MutationObserver(function () {
+        window.__tt4iLastMutation = performance.now();
+    }).observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__tt4iInflight++;
+        this.addEventListener('loadend', function () { window.__tt4iInflight--; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            window.__tt4iInflight++;
+            return fetch.apply(this, arguments).finally(function () { window.__tt4iInflight--; });
+        };
+    }
+}
+var now = performance.now();
+var lastResponse = 0;
+performance.getEntriesByType('resource').forEach(function (entry) {
+    lastResponse = Math.max(lastResponse, entry.responseEnd);
+});
+var animations = document.getAnimations ? document.getAnimations().filter(function (a) {
+    return a.playState === 'running' && a.effect && a.effect.getTiming().iterations !== Infinity;
+}).length : 0;
+return {
+    readyState: document.readyState,
+    domQuietMs: now - window.__tt4iLastMutation,
+    networkIdleMs: now - lastResponse,
+    inflight: window.__tt4iInflight + (window.jQuery ? window.jQuery.active : 0),
+    animations: animations
+};
+"""
+
+
+class StepBudget:
+    """Timeout budget shared by every wait inside one step"""
+
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+        self.started = time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return max(0.0, self.seconds - self.elapsed())
+
+    def timeout(self, cap=None):
+        """Returns the time left for the next wait, optionally capped"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutException(f"Step budget for '{self.name}' ({self.seconds}s) exhausted")
+        return min(remaining, cap) if cap else remaining
+
+
+def _timeout(budget, cap):
+    return budget.timeout(cap) if budget else cap
+
+
+def page_state(driver):
+    """Returns readiness, DOM, network and animation state of the current page"""
+    return driver.execute_script(PAGE_STATE_SCRIPT)
+
+
+def wait_until(driver, condition, budget=None, timeout=10, message=""):
+    """Polls any WebDriver condition within the step budget"""
+    with tracing.span("wait", "wait", condition=message or getattr(condition, "__name__", type(condition).__name__)):
+        return WebDriverWait(driver, _timeout(budget, timeout), poll_frequency=POLL_INTERVAL).until(condition, message)
+
+
+def pause(seconds):
+    """Fixed sleep, traced separately so benchmarks can tell it apart from condition waits"""
+    with tracing.span("sleep", "sleep", seconds=seconds):
+        time.sleep(seconds)
+
+
+def wait_for_dom_quiet(driver, budget=None, timeout=10, quiet_ms=DOM_QUIET_MS):
+    """Waits until the DOM has not mutated for quiet_ms"""
+    wait_until(driver, lambda d: page_state(d)["domQuietMs"] >= quiet_ms, budget, timeout,
+               f"DOM did not settle for {quiet_ms}ms")
+
+
+def wait_for_network_idle(driver, budget=None, timeout=10, idle_ms=NETWORK_IDLE_MS):
+    """Waits until no XHR/fetch is in flight and no resource finished loading for idle_ms"""
+    def idle(d):
+        state = page_state(d)
+        return state["inflight"] <= 0 and state["networkIdleMs"] >= idle_ms
+
+    wait_until(driver, idle, budget, timeout, f"Network did not become idle for {idle_ms}ms")
+
+
+def wait_for_animations(driver, budget=None, timeout=10):
+    """Waits until no finite CSS/Web animation is running"""
+    wait_until(driver, lambda d: page_state(d)["animations"] == 0, budget, timeout,
+               "Animations did not finish")
+
+
+def wait_for_page_settled(driver, budget=None, timeout=10, quiet_ms=DOM_QUIET_MS, idle_ms=NETWORK_IDLE_MS):
+    """Waits for document load, network idle, DOM quiescence and finished animations in one poll loop"""
+    def settled(d):
+        state = page_state(d)
+        return (state["readyState"] == "complete"
+                and state["inflight"] <= 0
+                and state["networkIdleMs"] >= idle_ms
+                and state["domQuietMs"] >= quiet_ms
+                and state["animations"] == 0)
+
+    wait_until(driver, settled, budget, timeout, "Page did not settle")
+
+
+def wait_for_stable_text(driver, locator, predicate=None, budget=None, timeout=10, stable_for=0.5):
+    """Waits until the element text satisfies predicate and stays unchanged for stable_for seconds"""
+    state = {"text": None, "since": None}
+
+    def stable(d):
+        try:
+            text = d.find_element(*locator).text.strip()
+        except (NoSuchElementException, StaleElementReferenceException):
+            state["text"] = None
+            return False
+        if predicate and not predicate(text):
+            state["text"] = None
+            return False
+        now = time.monotonic()
+        if text != state["text"]:
+            state["text"], state["since"] = text, now
+            return False
+        return text if now - state["since"] >= stable_for else False
+
+    return wait_until(driver, stable, budget, timeout, f"Text of {locator} did not stabilise")